@@ -2,6 +2,14 @@
 
 Taken from http://markmail.org/message/qn65kjlieq6n333k
 """
+import pyglet
+
+from .headless import HEADLESS
+
+if HEADLESS:
+    # Don't let pyglet.gl open a window when it is imported
+    pyglet.options['shadow_window'] = False
+
 import pyglet.image.atlas
 
 
@@ -4,9 +4,10 @@ from optparse import OptionParser
 def main():
     p = OptionParser()
     p.add_option('-l', '--level', type='int', help='Initial level', default=1)
+    p.add_option('-r', '--record', metavar='DIR', help='Save a replay of each flight in DIR')
     options, args = p.parse_args()
     g = Game()
-    g.start(level=options.level)
+    g.start(level=options.level, record=options.record)
 
 
 if __name__ == '__main__':
@@ -1,5 +1,6 @@
 import math
-import random
+from collections import namedtuple, OrderedDict
+import numpy
 import pyglet
 import pyglet.graphics
 import pyglet.sprite
@@ -9,7 +10,8 @@ from pyglet.gl import gl
 from . import loader
 from .camera import Rect
 from .vector import v
-from .primitives import walk
+from .hashrand import CellRandom, cell_key, row_random
+from .particles import QuadBuffer
 
 
 # This was extracted from source/sky.svg using tools/svg_to_gradient.py
@@ -22,6 +24,34 @@ SKY = [
 SKY_TOP = 50000
 
 
+def bounds_difference(a, b):
+    """Iterate over the cells in the bounds a that are not in the bounds b.
+
+    Bounds are (x0, x1, y0, y1) ranges of cell indices, as given by
+    SpatialSparseHash._cell_bounds(). The cells are found a strip at a time,
+    so this takes time in proportion to the cells it yields.
+
+    """
+    ax0, ax1, ay0, ay1 = a
+    bx0, bx1, by0, by1 = b
+    ox0 = max(ax0, bx0)
+    ox1 = min(ax1, bx1)
+    oy0 = max(ay0, by0)
+    oy1 = min(ay1, by1)
+    if ox0 >= ox1 or oy0 >= oy1:
+        # No overlap
+        ox0 = ox1 = ax0
+    for ix in xrange(ax0, ax1):
+        if ox0 <= ix < ox1:
+            for iy in xrange(ay0, oy0):
+                yield ix, iy
+            for iy in xrange(oy1, ay1):
+                yield ix, iy
+        else:
+            for iy in xrange(ay0, ay1):
+                yield ix, iy
+
+
 def lerp(frac, a, b):
     """Linear interpolation"""
     ifrac = (1 - frac)
@@ -51,76 +81,114 @@ class Gradient(object):
         else:
             return lastc
 
+    def table(self, step=10):
+        """Sample the gradient every `step` units, for quick lookups."""
+        return GradientTable(self, step)
 
-sky = Gradient(SKY, SKY_TOP)
 
+class GradientTable(object):
+    """A gradient sampled at regular intervals.
 
-class GradientPainter(object):
-    def __init__(self, gradient):
-        self.gradient = gradient
+    Looking up a colour returns the nearest sample; for the sky, colours
+    change by far less than one part in 256 between samples.
 
-    def draw(self, viewport):
-        gl.glClear(gl.GL_COLOR_BUFFER_BIT | gl.GL_DEPTH_BUFFER_BIT)
-        gl.glEnable(gl.GL_BLEND)
-        gl.glBlendFunc(gl.GL_SRC_ALPHA, gl.GL_ONE_MINUS_SRC_ALPHA)
+    """
+    def __init__(self, gradient, step):
+        self.step = float(step)
+        self.lo = gradient.gradient[0][0]
+        hi = gradient.gradient[-1][0]
+        n = int(math.ceil((hi - self.lo) / self.step)) + 1
+        self.colours = [gradient.colour(self.lo + i * self.step) for i in xrange(n)]
 
-        alt = viewport.bl.y
-        h = viewport.height 
-        w = viewport.width
-        c1 = self.gradient.colour(alt)
-        c2 = self.gradient.colour(alt + 10000)
-
-        o = v(0, 0)
-        x = v(w, 0)
-        y = v(0, h)
-
-        vs = [o, x, x + y, y]
-        cs = [c1, c1, c2, c2]
-        
-        pyglet.graphics.draw(4, gl.GL_QUADS,
-            ('v2f', list(walk(vs))),
-            ('c3f', list(walk(cs)))
-        )
+    def index(self, pos):
+        """Get the index of the sample nearest position `pos`."""
+        i = int((pos - self.lo) / self.step + 0.5)
+        return min(max(i, 0), len(self.colours) - 1)
 
+    def colour(self, pos):
+        return self.colours[self.index(pos)]
 
-class HorizonPainter(object):
-    def __init__(self, height, colour):
-        self.height = height
-        self.colour = colour
 
-    def draw(self, viewport):
-        alt = viewport.bl.y
+sky = Gradient(SKY, SKY_TOP)
 
-        if alt > self.height:
-            return
-        h = max(0, min(self.height - alt, viewport.height))
-        w = viewport.width
-        
-        o = v(0, 0)
-        x = v(w, 0)
-        y = v(0, h)
-
-        return self.draw_quad([o, x, x + y, y])
-
-    def draw_quad(self, vs):
-        """Draw a quad defined by vs"""
-        gl.glColor3f(*self.colour)
-        pyglet.graphics.draw(4, gl.GL_QUADS,
-            ('v2f', list(walk(vs))),
-        )
 
+class Backdrop(object):
+    """The sky, and flat bands such as the horizon and the sea.
+
+    Each band is a (height, colour, depth) tuple, painted over the sky from
+    the ground up to height. The sky fills the viewport, and its vertex list
+    is only rewritten when the camera moves far enough to change its colours.
+    The bands are drawn at their heights in the world, so their vertex list
+    only changes with the width of the viewport.
+
+    """
+    # The altitude range the viewport's height is shaded as
+    SPAN = 10000
+
+    # The depth of a band drawn in front of the world, hiding what is below it
+    FOREGROUND = 0.5
+
+    def __init__(self, gradient, bands=()):
+        self.table = gradient.table()
+        self.bands = list(bands)
+        self.sky_list = None
+        self.band_list = None
+        self.key = None
+
+    def create_vertex_lists(self):
+        self.sky_list = pyglet.graphics.vertex_list(4, 'v2f/dynamic', 'c3f/dynamic')
+        if self.bands:
+            cs = []
+            for height, colour, depth in self.bands:
+                cs.extend(tuple(colour) * 4)
+            self.band_list = pyglet.graphics.vertex_list(len(cs) // 3,
+                'v3f/dynamic',
+                ('c3f/static', cs)
+            )
+
+    def update(self, viewport):
+        """Rewrite the vertex lists if the viewport has moved to new sky colours."""
+        alt = viewport.bottom
+        t = self.table
+        key = (viewport.width, viewport.height, t.index(alt), t.index(alt + self.SPAN))
+        if key != self.key:
+            self.key = key
+            self.rebuild(key)
+
+    def rebuild(self, key):
+        w, h, i1, i2 = key
+        c1 = self.table.colours[i1]
+        c2 = self.table.colours[i2]
+        self.sky_list.vertices[:] = [0, 0, w, 0, w, h, 0, h]
+        self.sky_list.colors[:] = c1 + c1 + c2 + c2
+        if self.band_list is not None:
+            vs = []
+            for height, colour, z in self.bands:
+                vs.extend([0, 0, z, w, 0, z, w, height, z, 0, height, z])
+            self.band_list.vertices[:] = vs
 
-class ForegroundSeaPainter(HorizonPainter):
-    def draw_quad(self, vs):
-        """Draw a quad defined by vs"""
-        gl.glColor3f(*self.colour)
-        pyglet.graphics.draw(4, gl.GL_QUADS,
-            ('v3f', list(walk((v.x, v.y, 0.5) for v in vs))),
-        )
+    def draw(self, viewport):
+        gl.glClear(gl.GL_COLOR_BUFFER_BIT | gl.GL_DEPTH_BUFFER_BIT)
+        gl.glEnable(gl.GL_BLEND)
+        gl.glBlendFunc(gl.GL_SRC_ALPHA, gl.GL_ONE_MINUS_SRC_ALPHA)
+        if self.sky_list is None:
+            self.create_vertex_lists()
+        self.update(viewport)
+        self.sky_list.draw(gl.GL_QUADS)
+        if self.band_list is not None:
+            gl.glMatrixMode(gl.GL_MODELVIEW)
+            gl.glPushMatrix()
+            gl.glTranslatef(0, -viewport.bottom, 0)
+            self.band_list.draw(gl.GL_QUADS)
+            gl.glPopMatrix()
 
 
 class SpatialSparseHash(object):
     """A spatial hash in which the contents of the cells is computed procedurally."""
+
+    # Different seeds give different content for the same cells
+    seed = 0
+
     def __init__(self, cell_size=100):
         self.cell_size = cell_size
         self._cs = v(self.cell_size, self.cell_size)
@@ -147,6 +215,25 @@ class SpatialSparseHash(object):
                 cy += cs
             cx += cs
 
+    def _cell_bounds(self, viewport):
+        """Get the range of cell indices covering viewport.
+
+        This is (x0, x1, y0, y1), where x0 <= ix < x1 and y0 <= iy < y1 for
+        each cell (ix, iy); these are the same cells as _cells() gives.
+
+        """
+        cs = self.cell_size
+        return (
+            int(math.floor(viewport.left / cs)),
+            int(math.ceil(viewport.right / cs)),
+            int(math.floor(viewport.bottom / cs)),
+            int(math.ceil(viewport.top / cs)),
+        )
+
+    def _cell_coord(self, ix, iy):
+        cs = self.cell_size
+        return v(float(ix * cs), float(iy * cs))
+
     def _cell_rects(self, viewport):
         for bl in self._cells(viewport):
             yield Rect(bl, bl + self._cs)
@@ -164,10 +251,35 @@ class SpatialSparseHash(object):
         """
         return self._get(*self._params_for_coord(coord))
 
+    def _cell_index(self, x):
+        """Get the integer index of the cell with an edge at x."""
+        return int(round(x / self.cell_size))
+
     def _params_for_coord(self, c):
-        rand = random.Random()
-        rand.seed(hash(c))
-        return (Rect(c, c + self._cs), rand) 
+        key = cell_key(self._cell_index(c.x), self._cell_index(c.y), self.seed)
+        return (Rect(c, c + self._cs), CellRandom(key))
+
+    def row_random(self, y, xs, n):
+        """Get the first n random numbers of each cell at x in xs in row y.
+
+        This is an array of shape (len(xs), n) holding the values that
+        successive calls to random() would return for each cell.
+
+        """
+        ixs = [self._cell_index(x) for x in xs]
+        return row_random(ixs, self._cell_index(y), n, self.seed)
+
+    def _get_row(self, y, xs):
+        """Subclasses may implement this to generate a whole row at once."""
+        return [self.get(v(x, y)) for x in xs]
+
+    def get_row(self, y, xs):
+        """Get the contents of the cells at each x in xs in the row at y.
+
+        This gives the same results as calling get() for each cell.
+
+        """
+        return self._get_row(y, xs)
 
     def for_viewport(self, viewport):
         res = []
@@ -176,8 +288,48 @@ class SpatialSparseHash(object):
         return res
 
 
+# The contents of a cell: an image to draw at a position
+Placement = namedtuple('Placement', 'image position rotation')
+
+
+class SpritePool(object):
+    """Recycle sprites in a batch rather than creating and deleting them."""
+    def __init__(self, batch):
+        self.batch = batch
+        self.free = []
+        self.hits = 0
+        self.misses = 0
+
+    def acquire(self, image, position, rotation=0):
+        """Get a visible sprite showing image at position."""
+        x, y = position
+        if self.free:
+            self.hits += 1
+            s = self.free.pop()
+            if s.image is not image:
+                s.image = image
+            s.set_position(x, y)
+            s.rotation = rotation
+            s.visible = True
+        else:
+            self.misses += 1
+            s = pyglet.sprite.Sprite(image, x=x, y=y, batch=self.batch)
+            s.rotation = rotation
+        return s
+
+    def release(self, sprites):
+        """Hide sprites and return them to the pool."""
+        for s in sprites:
+            s.visible = False
+        self.free.extend(sprites)
+
+
 class Clouds(SpatialSparseHash):
     """Generate random clouds in a sparse but persistent way."""
+
+    # How many cells that have left the viewport to keep sprites for
+    CACHE_SIZE = 64
+
     @classmethod
     def load(cls):
         cls.images = [
@@ -186,10 +338,17 @@ class Clouds(SpatialSparseHash):
             loader.image('data/sprites/cloud3.png'),
         ]
 
-    def __init__(self, cell_size=500):
+    def __init__(self, cell_size=500, cache_size=CACHE_SIZE):
         super(Clouds, self).__init__(cell_size)
         self.batch = pyglet.graphics.Batch()
+        self.pool = SpritePool(self.batch)
         self.current = {}  # current cells
+        self.cache_size = cache_size
+        self.recent = OrderedDict()  # recently visible cells, oldest first
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.bounds = (0, 0, 0, 0)  # the cells in self.current
+        self.area = Rect((0, 0), (0, 0))  # the viewport, with a margin
 
     def _get(self, rect, random):
         if rect.bottom < 400 or rect.top > 50000:
@@ -198,40 +357,225 @@ class Clouds(SpatialSparseHash):
             img = random.choice(self.images)
             x = random.uniform(rect.left, rect.right)
             y = random.uniform(rect.bottom, rect.top)
-            c = pyglet.sprite.Sprite(img, x=x, y=y, batch=self.batch)
-            return [c]
+            return [Placement(img, (x, y), 0)]
         return []
 
-    def set_viewport(self, vp):
-        vp = vp.extend(256)
-        cs = set(self._cells(vp))
-        keys = set(self.current.keys())
+    def _get_row(self, y, xs):
+        cs = self.cell_size
+        if y < 400 or y + cs > 50000:
+            return [[] for x in xs]
+        u = self.row_random(y, xs, 4)
+        present = (u[:, 0] * (y * 0.0001) < 0.5).tolist()
+        images = [self.images[i] for i in (u[:, 1] * len(self.images)).astype(int)]
+        px = (numpy.asarray(xs, dtype=float) + cs * u[:, 2]).tolist()
+        py = (y + cs * u[:, 3]).tolist()
+        return [
+            [Placement(img, (x, y), 0)] if p else []
+            for p, img, x, y in zip(present, images, px, py)
+        ]
 
-        # Compute new
-        for coord in (cs - keys):
-            self.current[coord] = self.get(coord)
+    def recover(self, coord):
+        """Show the sprites for coord again if it was recently visible."""
+        try:
+            sprites = self.recent.pop(coord)
+        except KeyError:
+            return False
+        self.cache_hits += 1
+        for s in sprites:
+            s.visible = True
+        self.current[coord] = sprites
+        return True
+
+    def show_row(self, y, xs):
+        """Generate and show the cells at each x in xs in the row at y."""
+        for x, placements in zip(xs, self.get_row(y, xs)):
+            self.show(v(x, y), placements)
+
+    def show(self, coord, placements):
+        """Create sprites for the newly generated cell at coord."""
+        self.cache_misses += 1
+        self.current[coord] = [self.pool.acquire(*p) for p in placements]
+
+    def hide(self, coord):
+        """Hide the sprites for the cell at coord, keeping them for a while."""
+        sprites = self.current.pop(coord)
+        for s in sprites:
+            s.visible = False
+        self.recent[coord] = sprites
+        if len(self.recent) > self.cache_size:
+            coord, sprites = self.recent.popitem(last=False)
+            self.pool.release(sprites)
+
+    def stats(self):
+        """Counters for how well sprites and cells are being reused."""
+        return {
+            'pool_hits': self.pool.hits,
+            'pool_misses': self.pool.misses,
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+        }
+
+    def set_viewport(self, vp):
+        area = self.area
+        area.assign(vp)
+        area.extend_ip(256)
+        bounds = self._cell_bounds(area)
+        old = self.bounds
+        if bounds == old:
+            return
+        self.bounds = bounds
+
+        # Compute new, recovering recently visible cells and generating the
+        # rest a row at a time
+        rows = {}
+        for ix, iy in bounds_difference(bounds, old):
+            coord = self._cell_coord(ix, iy)
+            if not self.recover(coord):
+                rows.setdefault(coord.y, []).append(coord.x)
+        for y, xs in rows.items():
+            self.show_row(y, xs)
 
         # Delete existing
-        for coord in (keys - cs):
-            del(self.current[coord])
+        for ix, iy in bounds_difference(old, bounds):
+            self.hide(self._cell_coord(ix, iy))
 
     def draw(self):
         self.batch.draw()
 
 
 class Stars(Clouds):
-    """Generate random clouds in a sparse but persistent way."""
+    """Generate random stars in a sparse but persistent way.
+
+    Rather than a sprite per star, the stars of all the current cells are
+    written as textured quads into one vertex list, which is only rewritten
+    when cells enter or leave the viewport.
+
+    """
+    seed = 1
+
+    # Stars appear above this altitude, more of them the higher it is
+    ALTITUDE = 20000
+
+    # The most stars in a cell, per pixel of the cell's altitude above ALTITUDE
+    DENSITY = 0.0001
+
     @classmethod
     def load(cls):
         cls.image = loader.image('data/sprites/star.png')
 
+    def __init__(self, cell_size=500, cache_size=Clouds.CACHE_SIZE, density=DENSITY):
+        super(Stars, self).__init__(cell_size, cache_size)
+        self.density = density
+        self.buffer = None
+
     def _get(self, rect, random):
         cs = []
-        if rect.bottom > 20000:
-            for i in range(int(random.uniform(0, (rect.bottom - 20000) * 0.0001))):
+        if rect.bottom > self.ALTITUDE:
+            for i in range(int(random.uniform(0, (rect.bottom - self.ALTITUDE) * self.density))):
                 x = random.uniform(rect.left, rect.right)
                 y = random.uniform(rect.bottom, rect.top)
-                c = pyglet.sprite.Sprite(self.image, x=x, y=y, batch=self.batch)
-                c.rotation = random.randint(0, 60)
-                cs.append(c)
+                cs.append(Placement(self.image, (x, y), random.randint(0, 60)))
         return cs
+
+    def _star_row(self, y, xs):
+        """Generate the stars of the cells at each x in xs in the row at y.
+
+        Return arrays of the number of stars in each cell, and of the x, y and
+        rotation of each possible star, with a row per cell; only the first
+        count of each row are used.
+
+        """
+        density = (y - self.ALTITUDE) * self.density
+        n = int(density)  # the most stars in any cell
+        u = self.row_random(y, xs, 1 + 3 * n)
+        counts = (u[:, 0] * density).astype(int)
+        px = numpy.asarray(xs, dtype=float)[:, numpy.newaxis] + self.cell_size * u[:, 1::3]
+        py = y + self.cell_size * u[:, 2::3]
+        rot = (u[:, 3::3] * 61).astype(int)
+        return counts, px, py, rot
+
+    def _get_row(self, y, xs):
+        if y <= self.ALTITUDE:
+            return [[] for x in xs]
+        counts, px, py, rot = self._star_row(y, xs)
+        px = px.tolist()
+        py = py.tolist()
+        rot = rot.tolist()
+        img = self.image
+        return [
+            [Placement(img, (px[i][j], py[i][j]), rot[i][j]) for j in xrange(count)]
+            for i, count in enumerate(counts.tolist())
+        ]
+
+    def quads(self, x, y, rotation):
+        """Compute the vertices of stars at arrays x and y, rotated clockwise."""
+        img = self.image
+        ax, ay = img.anchor_x, img.anchor_y
+        # Corners relative to the anchor, anticlockwise
+        cx = numpy.array([-ax, img.width - ax, img.width - ax, -ax], dtype=float)
+        cy = numpy.array([-ay, -ay, img.height - ay, img.height - ay], dtype=float)
+        r = numpy.radians(-rotation)
+        cr = numpy.cos(r)[:, numpy.newaxis]
+        sr = numpy.sin(r)[:, numpy.newaxis]
+        verts = numpy.empty((len(x), 4, 2), dtype=numpy.float32)
+        verts[:, :, 0] = cx * cr - cy * sr + x[:, numpy.newaxis]
+        verts[:, :, 1] = cx * sr + cy * cr + y[:, numpy.newaxis]
+        return verts.reshape(-1, 8)
+
+    def show_row(self, y, xs):
+        """Compute the quads for a row of cells at once."""
+        self.cache_misses += len(xs)
+        if y <= self.ALTITUDE:
+            empty = numpy.empty((0, 8), dtype=numpy.float32)
+            for x in xs:
+                self.current[v(x, y)] = empty
+            return
+        counts, px, py, rot = self._star_row(y, xs)
+        used = numpy.arange(px.shape[1]) < counts[:, numpy.newaxis]
+        quads = self.quads(px[used], py[used], rot[used])
+        cells = numpy.split(quads, numpy.cumsum(counts)[:-1])
+        for x, q in zip(xs, cells):
+            self.current[v(x, y)] = q
+
+    def recover(self, coord):
+        try:
+            quads = self.recent.pop(coord)
+        except KeyError:
+            return False
+        self.cache_hits += 1
+        self.current[coord] = quads
+        return True
+
+    def hide(self, coord):
+        self.recent[coord] = self.current.pop(coord)
+        if len(self.recent) > self.cache_size:
+            self.recent.popitem(last=False)
+
+    def set_viewport(self, vp):
+        bounds = self.bounds
+        super(Stars, self).set_viewport(vp)
+        if self.bounds != bounds:
+            self.update_buffer()
+
+    def update_buffer(self):
+        """Write the stars of all the current cells into the vertex list."""
+        quads = [q for q in self.current.values() if len(q)]
+        if not quads and self.buffer is None:
+            return
+        if self.buffer is None:
+            texture = self.image.get_texture()
+            self.buffer = QuadBuffer(
+                texture.tex_coords,
+                batch=self.batch,
+                group=pyglet.sprite.SpriteGroup(
+                    texture, gl.GL_SRC_ALPHA, gl.GL_ONE_MINUS_SRC_ALPHA
+                )
+            )
+        if quads:
+            verts = numpy.concatenate(quads)
+        else:
+            verts = numpy.empty((0, 8), dtype=numpy.float32)
+        n = len(verts)
+        colours = numpy.empty((n, 16), dtype=numpy.uint8)
+        colours.fill(255)
+        self.buffer.set_quads(n, verts, colours)
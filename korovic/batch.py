@@ -0,0 +1,116 @@
+"""Fly many designs for Susie in parallel, without a display.
+
+A loadout is a list of (component class, slot id, angle) tuples describing
+what to attach to Susie's Slots. The angle is in degrees, as shown in the
+editor, or None to keep the component's default angle for that slot.
+
+Each flight presses every control at launch and runs until Susie crashes,
+reaches the goal or runs out of time.
+
+KOROVIC_HEADLESS=1 must be set in the environment before korovic is imported,
+so that neither this process nor the workers need a display.
+
+"""
+import math
+from multiprocessing import Pool
+
+from .components import IncompatibleComponent
+from .world import FlightResult
+
+
+LEVELS = ['level%d' % i for i in xrange(1, 6)]
+
+# The HeadlessWorld for each level this worker has flown, so that each level's
+# SVG is only parsed once per worker
+_worlds = {}
+
+# The loadout Susie is currently fitted with in each of those worlds; flying
+# the same loadout again lets World.reset restore its launch snapshot
+_fitted = {}
+
+
+def get_world(level):
+    try:
+        return _worlds[level]
+    except KeyError:
+        from .world import HeadlessWorld
+        w = _worlds[level] = HeadlessWorld(level)
+        return w
+
+
+def fit(world, loadout):
+    """Replace the components attached to Susie with loadout."""
+    world.remove_squid()
+    world.squid.fit([
+        (component_class, slot, None if angle is None else math.radians(angle))
+        for component_class, slot, angle in loadout
+    ])
+
+
+def fly(world, max_time):
+    """Fly Susie as she is fitted in world, returning a FlightResult.
+
+    World.reset puts the level's actors back too, so the result doesn't
+    depend on what this worker flew before.
+
+    """
+    world.reset()
+    for c in world.controllers():
+        c.on_press()
+    return world.run_until_done(max_time)
+
+
+def _run(job):
+    key, level, loadout, max_time = job
+    world = get_world(level)
+    try:
+        if _fitted.get(level) != loadout:
+            _fitted[level] = None
+            fit(world, loadout)
+            _fitted[level] = loadout
+    except IncompatibleComponent:
+        return key, FlightResult('incompatible', 0.0, 0.0)
+    return key, fly(world, max_time)
+
+
+def run_jobs(jobs, processes=None):
+    """Run (key, level, loadout, max_time) jobs over a pool of workers.
+
+    Yields (key, FlightResult) pairs in the order the flights finish.
+
+    """
+    pool = Pool(processes)
+    try:
+        for res in pool.imap_unordered(_run, jobs):
+            yield res
+        pool.close()
+    except:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+
+
+def evaluate(loadouts, level='level1', max_time=60, processes=None):
+    """Fly each of loadouts on level.
+
+    Yields (index, FlightResult) pairs as each flight finishes, where index
+    is the position of the loadout in loadouts.
+
+    """
+    jobs = [(i, level, l, max_time) for i, l in enumerate(loadouts)]
+    return run_jobs(jobs, processes)
+
+
+def evaluate_levels(loadouts, levels=LEVELS, max_time=60, processes=None):
+    """Fly each of loadouts on each of levels.
+
+    Yields ((index, level), FlightResult) pairs as each flight finishes.
+
+    """
+    jobs = [
+        ((i, level), level, l, max_time)
+        for level in levels
+        for i, l in enumerate(loadouts)
+    ]
+    return run_jobs(jobs, processes)
@@ -6,75 +6,133 @@ from .vector import v
 
 
 class Rect(object):
-    __slots__ = 'bl', 'tr'
+    """An axis-aligned rectangle, from its bottom left to its top right.
+
+    The edges are stored as floats; the corner vectors are built when first
+    needed and cached. The _ip methods change the rect in place, for hot
+    paths that would otherwise allocate a new one, so don't use them on
+    rects that may be shared.
+
+    """
+    __slots__ = 'left', 'bottom', 'right', 'top', '_corners'
 
     def __init__(self, bl, tr):
-        self.bl = v(bl)
-        self.tr = v(tr)
+        l, b = bl
+        r, t = tr
+        self.left = float(l)
+        self.bottom = float(b)
+        self.right = float(r)
+        self.top = float(t)
+        self._corners = None
 
     def __repr__(self):
-        return 'Rect(%r, %r)' % (tuple(self.bl), tuple(self.tr))
+        return 'Rect(%r, %r)' % ((self.left, self.bottom), (self.right, self.top))
 
-    @property
-    def br(self):
-        return v(self.tr.x, self.bl.y)
+    def corners(self):
+        """The corners (bl, br, tr, tl) as vectors."""
+        cs = self._corners
+        if cs is None:
+            l, b, r, t = self.left, self.bottom, self.right, self.top
+            cs = self._corners = (v(l, b), v(r, b), v(r, t), v(l, t))
+        return cs
 
     @property
-    def tl(self):
-        return v(self.bl.x, self.tr.y)
+    def bl(self):
+        return self.corners()[0]
 
     @property
-    def height(self):
-        return (self.tr - self.bl).y
-
-    @property
-    def left(self):
-        return self.bl.x
+    def br(self):
+        return self.corners()[1]
 
     @property
-    def right(self):
-        return self.tr.x
+    def tr(self):
+        return self.corners()[2]
 
     @property
-    def bottom(self):
-        return self.bl.y
+    def tl(self):
+        return self.corners()[3]
 
     @property
-    def top(self):
-        return self.tr.y
+    def width(self):
+        return self.right - self.left
 
     @property
-    def width(self):
-        return (self.tr - self.bl).x
+    def height(self):
+        return self.top - self.bottom
 
     def __hash__(self):
-        return hash((self.tr, self.bl))
+        return hash((self.left, self.bottom, self.right, self.top))
 
     def __eq__(self, ano):
         return (
-            self.bl == ano.bl and 
-            self.tr == ano.tr
+            self.left == ano.left and
+            self.bottom == ano.bottom and
+            self.right == ano.right and
+            self.top == ano.top
         )
 
+    def __ne__(self, ano):
+        return not self == ano
+
     def __contains__(self, point):
+        x, y = point
+        return self.left <= x < self.right and self.bottom <= y < self.top
+
+    def contains_many(self, points):
+        """Test which of an (n, 2) array of points are in the rect."""
+        x = points[:, 0]
+        y = points[:, 1]
         return (
-            self.left <= point.x < self.right and
-            self.bottom <= point.y < self.top
+            (self.left <= x) & (x < self.right) &
+            (self.bottom <= y) & (y < self.top)
         )
 
     def extend(self, dist):
         """Compute a new rect bigger than this by dist in each direction."""
-        o = v(dist, dist)
-        return Rect(self.bl - o, self.tr + o)
+        return Rect(
+            (self.left - dist, self.bottom - dist),
+            (self.right + dist, self.top + dist)
+        )
+
+    def extend_ip(self, dist):
+        """Grow this rect by dist in each direction."""
+        self.left -= dist
+        self.bottom -= dist
+        self.right += dist
+        self.top += dist
+        self._corners = None
 
     def translate(self, dv):
-        return Rect(self.bl + dv, self.tr + dv)
-        
+        dx, dy = dv
+        return Rect(
+            (self.left + dx, self.bottom + dy),
+            (self.right + dx, self.top + dy)
+        )
+
+    def assign(self, rect):
+        """Make this rect the same as rect, in place."""
+        self.left = rect.left
+        self.bottom = rect.bottom
+        self.right = rect.right
+        self.top = rect.top
+        self._corners = None
+
+    def translate_ip(self, dv):
+        """Move this rect by dv."""
+        dx, dy = dv
+        self.left += dx
+        self.bottom += dy
+        self.right += dx
+        self.top += dy
+        self._corners = None
+
 
 class Camera(object):
     def __init__(self):
         self.ss = v(*SCREEN_SIZE) * 0.5
         self.pos = self.ss
+        self._viewport = None
+        self._viewport_pos = None
     
     def pan_to(self, point):
         x, y = self.pos + (point - self.pos) * 0.1
@@ -94,8 +152,19 @@ class Camera(object):
         self.set_pos(actor.body.position, max_x=max_x)
 
     def viewport(self):
-        ss = v(*SCREEN_SIZE) * 0.5
-        return Rect(self.pos - ss, self.pos + ss)
+        """The rect of the world on screen.
+
+        The camera keeps one Rect and moves it in place, so callers must not
+        change it, and must copy it to keep it from frame to frame.
+
+        """
+        if self._viewport_pos != self.pos:
+            if self._viewport is None:
+                self._viewport = Rect(self.pos - self.ss, self.pos + self.ss)
+            else:
+                self._viewport.translate_ip(self.pos - self._viewport_pos)
+            self._viewport_pos = self.pos
+        return self._viewport
 
     @contextmanager
     def modelview(self):
@@ -0,0 +1,62 @@
+"""Lookup tables for aerodynamic coefficients.
+
+Wings and similar components look up their lift coefficients against angle
+of attack, rather than evaluate trigonometry every tick. Each class builds its
+tables from its formulas when it is loaded; the formulas are kept, and are
+used instead if the class's reference flag is set.
+
+"""
+import numpy
+
+
+class AeroTable(object):
+    """A function sampled at evenly spaced points, for linear interpolation.
+
+    Lookups outside the range of the table are clamped to its ends.
+
+    """
+    def __init__(self, func, lo, hi, step):
+        self.lo = float(lo)
+        self.hi = float(hi)
+        self.step = float(step)
+        n = int(round((self.hi - self.lo) / self.step)) + 1
+        self.xs = numpy.linspace(self.lo, self.hi, n)
+        self.values = numpy.array([func(x) for x in self.xs], dtype=float)
+        # Python floats are quicker to index one at a time
+        self.value_list = self.values.tolist()
+
+    def __len__(self):
+        return len(self.value_list)
+
+    def __call__(self, x):
+        vs = self.value_list
+        f = (x - self.lo) / self.step
+        if f <= 0:
+            return vs[0]
+        i = int(f)
+        if i >= len(vs) - 1:
+            return vs[-1]
+        a = vs[i]
+        return a + (vs[i + 1] - a) * (f - i)
+
+
+class AeroTableRows(object):
+    """Several tables stacked, to look up one value in each at once.
+
+    The tables must all cover the same range with the same step.
+
+    """
+    def __init__(self, tables):
+        t = tables[0]
+        self.lo = t.lo
+        self.step = t.step
+        self.values = numpy.array([t.values for t in tables])
+        self.rows = numpy.arange(len(tables))
+
+    def sample(self, xs):
+        """Look up xs[i] in the i-th table, for each i."""
+        n = self.values.shape[1]
+        f = numpy.clip((xs - self.lo) / self.step, 0, n - 1)
+        i = numpy.minimum(f.astype(int), n - 2)
+        a = self.values[self.rows, i]
+        return a + (self.values[self.rows, i + 1] - a) * (f - i)
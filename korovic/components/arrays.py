@@ -0,0 +1,134 @@
+"""Component state held in arrays, to compute Susie's forces in one pass.
+
+Engines and wings make up most loadouts, and each tick all they do is push
+on Susie's body. Rather than have each rotate its own vectors and apply its
+own force, Susie keeps their attachment points, thrust vectors, fuel rates
+and lift coefficients in numpy arrays. Forces and torques for all of them
+are summed in body space, which doesn't depend on Susie's angle, and then
+applied to her body once.
+
+The arrays only change when the loadout does, and are rebuilt then. Other
+components still update themselves one by one.
+
+"""
+import numpy
+
+from .aero import AeroTableRows
+
+ENGINE = 'engine'
+WING = 'wing'
+
+
+def rotate(xy, angle):
+    """Rotate each row of the (n, 2) array xy by angle, in radians.
+
+    angle may be a single angle or an array of one angle per row.
+
+    """
+    c = numpy.cos(angle)
+    s = numpy.sin(angle)
+    x = xy[:, 0]
+    y = xy[:, 1]
+    return numpy.column_stack((x * c - y * s, x * s + y * c))
+
+
+def points(vs):
+    return numpy.array([tuple(p) for p in vs], dtype=float).reshape(-1, 2)
+
+
+class ComponentArrays(object):
+    """The state of the engines and wings attached to a squid."""
+    def __init__(self, squid):
+        self.squid = squid
+        components = squid.slots.components
+        self.engines = [c for c in components if c.force_model == ENGINE]
+        self.wings = [c for c in components if c.force_model == WING]
+        self.others = [c for c in components if c.force_model is None]
+
+        es = self.engines
+        self.engine_points = points(c.attachment_point + c.OFFSET for c in es)
+        self.thrust = rotate(
+            points(c.FORCE for c in es),
+            numpy.array([c.force_angle() for c in es], dtype=float)
+        )
+        self.fuel_rate = numpy.array([c.FUEL_CONSUMPTION for c in es], dtype=float)
+        self.started = numpy.array([c.started for c in es], dtype=bool)
+
+        ws = self.wings
+        self.wing_points = points(c.attachment_point for c in ws)
+        self.wing_angle = numpy.array([c.angle for c in ws], dtype=float)
+        self.wing_cos = numpy.cos(self.wing_angle)
+        self.wing_sin = numpy.sin(self.wing_angle)
+        self.lift_rate = numpy.array([c.LIFT_RATE for c in ws], dtype=float)
+        self.max_lift = numpy.array([c.MAX_LIFT for c in ws], dtype=float)
+        self.stall_angle = numpy.array([c.STALL_ANGLE for c in ws], dtype=float)
+        self.reference = any(c.reference for c in ws)
+        if ws and not self.reference:
+            self.lift_tables = AeroTableRows([c.lift_table for c in ws])
+
+    def update(self, dt):
+        """Update all the components and apply their forces to the squid."""
+        for c in self.others:
+            c.update(dt)
+        for c in self.engines:
+            c.prepare(dt)
+
+        force = numpy.zeros(2)
+        torque = 0.0
+        for f, t in self.engine_forces(dt), self.wing_forces():
+            force += f
+            torque += t
+
+        body = self.squid.body
+        if torque or force.any():
+            f = rotate(force[numpy.newaxis], body.angle)[0]
+            body.apply_force(tuple(f), (0, 0))
+            body.torque += torque
+
+    @staticmethod
+    def total(forces, points):
+        """Sum forces acting at points, returning the force and its torque."""
+        torque = points[:, 0] * forces[:, 1] - points[:, 1] * forces[:, 0]
+        return forces.sum(axis=0), torque.sum()
+
+    def engine_forces(self, dt):
+        if not self.engines:
+            return numpy.zeros(2), 0.0
+        squid = self.squid
+        active = numpy.array([c.thrusting() for c in self.engines], dtype=bool)
+        demand = self.fuel_rate * (dt * active)
+
+        # Engines draw fuel in turn, and each runs if there was any left when
+        # it did; those that need none always run
+        before = squid.fuel - (numpy.cumsum(demand) - demand)
+        ran = active & ((demand == 0) | (before > 0))
+        squid.draw_fuel(min(squid.fuel, float(demand[ran].sum())))
+
+        for i in numpy.flatnonzero(ran != self.started):
+            self.engines[i].set_running(bool(ran[i]))
+        self.started = ran
+        return self.total(self.thrust[ran], self.engine_points[ran])
+
+    def wing_forces(self):
+        if not self.wings:
+            return numpy.zeros(2), 0.0
+        body = self.squid.body
+        vx, vy = body.velocity
+        speed2 = vx * vx + vy * vy
+
+        # The angle of attack is that of the velocity in each wing's space
+        a = -(body.angle + self.wing_angle)
+        wx = vx * numpy.cos(a) - vy * numpy.sin(a)
+        wy = vx * numpy.sin(a) + vy * numpy.cos(a)
+        aoa = -numpy.degrees(numpy.arctan2(wy, wx))
+
+        if self.reference:
+            coeff = self.lift_rate * numpy.sin(2 * numpy.radians(aoa + 5))
+        else:
+            coeff = self.lift_tables.sample(aoa)
+        lift = numpy.clip(coeff * speed2, -self.max_lift, self.max_lift)
+        lift *= (speed2 > 1) & (-self.stall_angle < aoa) & (aoa < self.stall_angle)
+
+        # Lift acts along each wing's y axis
+        forces = numpy.column_stack((-lift * self.wing_sin, lift * self.wing_cos))
+        return self.total(forces, self.wing_points)
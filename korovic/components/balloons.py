@@ -15,15 +15,20 @@ class Balloon(Component):
     MASS = 3
     ALT_ATTENUATION = 0.00001  # how fast lift drops off with altitude
     slot_mask = Slot.TOP | Slot.NOSE | Slot.TAIL
+    tether = None
+    tether_class = Tether
 
     def __init__(self, squid, attachment_point):
         super(Balloon, self).__init__(squid, attachment_point)
         self.reset()
 
     def reset(self):
+        if self.tether:
+            self.tether.delete()
         self.tether = None
         self.create_body()
         self.tether_to(self.squid.body) 
+        self.set_layers(self.layers)
         super(Balloon, self).reset()
 
     def bodies_and_shapes(self):
@@ -41,7 +46,7 @@ class Balloon(Component):
 
     def tether_to(self, body):
         self.body.position = self.home_position()
-        self.tether = Tether(
+        self.tether = self.tether_class(
             a=self.body.local_to_world(-self.insertion_point),
             b=v(body.position + self.attachment_point),
             c1=self.body,
@@ -59,6 +64,7 @@ class Balloon(Component):
             # lift drops off with altitude
             frac = 1.0 / (1 + alt * 0.0001)
         self.body.apply_force(frac * self.LIFT)
+        self.tether.update(dt)
 
     def get_position(self):
         return v(self.body.position)
@@ -76,6 +82,24 @@ class Balloon(Component):
     def rotation(self):
         return self.body.angle
 
+    def set_layers(self, layers):
+        super(Balloon, self).set_layers(layers)
+        if self.tether:
+            if layers is None:
+                self.tether.set_batch(None)
+            else:
+                self.tether.set_batch(layers.batch, layers.component_tethers)
+
+    def set_visible(self, visible):
+        super(Balloon, self).set_visible(visible)
+        if self.tether:
+            self.tether.set_visible(visible)
+
+    def update_sprite(self):
+        if self.tether:
+            self.tether.update_vertices()
+        super(Balloon, self).update_sprite()
+
     def draw_component(self):
         if self.tether:
             self.tether.draw()
@@ -94,6 +118,11 @@ class HotAirBalloon(ActiveSound, Balloon, OnAnimation, ActivateableComponent):
 
     sound = load_sound('data/sounds/hotairballoon.wav')
 
+    def reset_state(self):
+        super(HotAirBalloon, self).reset_state()
+        self.temp = 0
+        self.started = False
+
     def update(self, dt):
         ran = False
         if self.active:
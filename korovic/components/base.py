@@ -1,11 +1,11 @@
 import json
-import pyglet
 from pyglet import gl
 import pymunk
 import math
 
 from ..vector import v
 from .. import loader
+from ..headless import Sprite
 
 from ..editor import SlotEditor
 
@@ -19,6 +19,11 @@ class Component(object):
     selected = False
     angle = 0
     abstract = True
+    layers = None
+
+    # If set, Susie computes this component's forces along with all others
+    # of the same model, in ComponentArrays, instead of calling update()
+    force_model = None
 
     yfix = 1    # This is a bodge to fix insertion points
                 # Haven't figured out the cause of the bug, just the solution :-/
@@ -77,7 +82,7 @@ class Component(object):
     def __init__(self, squid, attachment_point):
         self.squid = squid
         self.attachment_point = attachment_point
-        self.sprite = pyglet.sprite.Sprite(self.image, 0, 0)
+        self.sprite = Sprite(self.image, 0, 0)
         self.body = None
 
     def attach_at_slot(self, slot):
@@ -111,14 +116,14 @@ class Component(object):
         img = cls.image.get_region(0, 0, w, h)
         img.anchor_x = w * 0.5
         img.anchor_y = h * 0.5
-        icon = pyglet.sprite.Sprite(img)
+        icon = Sprite(img)
         if s > size:
             icon.scale = float(size) / s
         return icon
 
     def get_position(self):
         """World position of the component."""
-        p = self.attachment_point + self.insertion_point.rotated(math.degrees(self.angle))  # position of the insertion point in body space
+        p = self.attachment_point + self.insertion_point.rotated_rad(self.angle)  # position of the insertion point in body space
         return v(self.squid.body.local_to_world(p))
     position = property(get_position)
 
@@ -142,9 +147,31 @@ class Component(object):
             c.group = self.collision_group
             self.shapes.append(c)
 
-    def draw_component(self):
+    def set_layers(self, layers):
+        """Keep the component's sprites in the world's Layers.
+
+        If layers is None, the sprites are removed from any batch and must be
+        drawn with draw().
+
+        """
+        self.layers = layers
+        if layers is None:
+            self.sprite.batch = None
+            self.sprite.group = None
+        else:
+            self.sprite.group = layers.components
+            self.sprite.batch = layers.batch
+
+    def set_visible(self, visible):
+        self.sprite.visible = visible
+
+    def update_sprite(self):
+        """Move the sprite to the component's current position."""
         self.sprite.set_position(*self.position)
         self.sprite.rotation = -math.degrees(self.rotation)
+
+    def draw_component(self):
+        self.update_sprite()
         self.sprite.draw()
 
     def draw(self):
@@ -156,6 +183,16 @@ class Component(object):
     def update(self, dt):
         """Components can override this to add behaviour."""
 
+    def release(self):
+        """Let go of anything held outside the component, when it is detached.
+
+        The component may be attached again, and must then take them anew.
+
+        """
+
+    def prepare(self, dt):
+        """Update state other than forces, if force_model is set."""
+
     def controller(self):
         """Components can return a controller here that can respond to input events."""
 
@@ -173,7 +210,7 @@ class Component(object):
         """The wind velocity over the component in component space."""
         vel = -self.velocity()
         a = self.squid.body.angle + self.angle
-        return vel.rotated(math.degrees(-a))
+        return vel.rotated_rad(-a)
 
     def attachment_position(self):
         return v(self.squid.body.local_to_world(self.attachment_point))
@@ -197,7 +234,7 @@ class Component(object):
         
         offset if given is the offset of the force from the attachment point in component space.
         """
-        f = f.rotated(math.degrees(self.squid.body.angle + self.angle))
+        f = f.rotated_rad(self.squid.body.angle + self.angle)
         pos = self.squid.body.local_to_world(self.attachment_point + offset) - self.squid.body.position
         self.squid.body.apply_force(f=f, r=pos)
 
@@ -210,6 +247,15 @@ class Component(object):
 
     def reset(self):
         """Reset the state of the component."""
+        self.reset_state()
+
+    def reset_state(self):
+        """Reset the state of the component other than its physics bodies.
+
+        This is all that is needed when the bodies are restored from a
+        snapshot rather than recreated.
+
+        """
 
 
 class ActivateableComponent(Component):
@@ -232,6 +278,5 @@ class ActivateableComponent(Component):
     def on_stop(self):
         pass
 
-    def reset(self):
-        """Reset the state of the component."""
+    def reset_state(self):
         self.active = self.initial
@@ -1,12 +1,4 @@
 import math
-from pyglet import gl
-from pyglet.graphics import Batch
-from pyglet.sprite import Sprite
-
-from lepton import Particle, ParticleGroup
-from lepton.emitter import StaticEmitter
-from lepton import controller
-from lepton import domain
 
 from ..constants import SEA_LEVEL
 from ..vector import v
@@ -14,18 +6,20 @@ from ..editor import AngleEditor, SlotEditor
 from ..controllers import PressController, OneTimeController
 
 from .base import Component, ActivateableComponent
+from .arrays import ENGINE
 from .squid import Slot
 
 from ..sound import load_sound
 from .. import loader
+from .. import particles
 
 
 class ActiveSound(object):
     sound_channel = None
     sound = None
 
-    def reset(self):
-        super(ActiveSound, self).reset()
+    def reset_state(self):
+        super(ActiveSound, self).reset_state()
         self.on_stop()
 
     def on_start(self):
@@ -47,12 +41,14 @@ class OnAnimation(Component):
         cls.image_on.anchor_x = cls.image.anchor_x
         cls.image_on.anchor_y = cls.image.anchor_y
 
-    def draw(self):
+    def update_sprite(self):
         if self.active and self.is_enabled():
-            self.sprite.image = self.image_on
+            image = self.image_on
         else:
-            self.sprite.image = self.image
-        super(OnAnimation, self).draw()
+            image = self.image
+        if self.sprite.image is not image:
+            self.sprite.image = image
+        super(OnAnimation, self).update_sprite()
 
 
 class Engine(ActivateableComponent):
@@ -62,23 +58,36 @@ class Engine(ActivateableComponent):
     FUEL_CONSUMPTION = 6
     OFFSET = v(0, 0)
     started = False
+    force_model = ENGINE
 
     def force_angle(self):
         return self.angle
 
+    def thrusting(self):
+        """Return True if the engine wants to thrust this tick."""
+        return self.active
+
+    def reset_state(self):
+        super(Engine, self).reset_state()
+        self.started = False
+
+    def set_running(self, running):
+        if running and not self.started:
+            self.on_start()
+            self.started = True
+        elif not running and self.started:
+            self.on_stop()
+            self.started = False
+
     def update(self, dt):
         ran = False
-        if self.active:
+        self.prepare(dt)
+        if self.thrusting():
             if self.squid.draw_fuel(self.FUEL_CONSUMPTION * dt):
-                if not self.started:
-                    self.on_start()
-                    self.started = True
                 ran = True
-                thrust = self.FORCE.rotated(math.degrees(self.squid.body.angle + self.force_angle()))
+                thrust = self.FORCE.rotated_rad(self.squid.body.angle + self.force_angle())
                 self.apply_force_absolute(thrust, self.OFFSET)
-        if not ran and self.started:
-            self.on_stop()
-            self.started = False
+        self.set_running(ran)
 
     def is_enabled(self):
         return self.squid.has_fuel()
@@ -95,25 +104,6 @@ class JetEngine(ActiveSound, OnAnimation, Engine):
     sound = load_sound('data/sounds/jet.wav')
 
 
-class Renderer(object):
-    """A replacement for lepton's billboard renderer."""
-    def __init__(self, image):
-        self.image = image
-
-    def draw(self, group):
-        batch = Batch()
-        ss = []
-        for particle in group:
-            s = Sprite(self.image, batch=batch)
-            s.position = list(particle.position)[:2]
-            s.color = [c * 255 for c in list(particle.color)[:3]]
-            s.scale = particle.size[0] / 64.0
-            s.rotation = particle.age * 720
-            s.opacity = particle.color[3] * 255
-            ss.append(s)
-        batch.draw()
-            
-
 class Rocket(ActiveSound, Engine):
     sound = load_sound('data/sounds/rocket.wav')
     @classmethod
@@ -126,42 +116,43 @@ class Rocket(ActiveSound, Engine):
         img.anchor_x = w * 0.5
         img.anchor_y = h * 0.5
         cls.particle_controllers = [
-            controller.Movement(),
-            controller.Lifetime(max_age=2),
-            controller.Growth(30.0),
-            controller.ColorBlender([
+            particles.Movement(),
+            particles.Lifetime(max_age=2),
+            particles.Growth(30.0),
+            particles.ColorBlender([
                 (0, (1.0, 0.9, 0.0, 1.0)),
                 (1, (0.0, 0.0, 0.0, 0.2)),
                 (3, (0.0, 0.0, 0.0, 0.0)),
             ]),
-            controller.Bounce(
-                domain=domain.Plane(
-                    (0, SEA_LEVEL, 0),
-                    (0, 1, 0)
-                ),
-                bounce=0.02
-            )
+            particles.Bounce(SEA_LEVEL, bounce=0.02)
         ]
-        cls.particle_renderer = Renderer(cls.particle_texture)
+        cls.particle_renderer = particles.Renderer(cls.particle_texture)
 
     MASS = 10
     BURN_TIME = 3
     FORCE = v(100000, 0)
     FUEL_CONSUMPTION = 0
+    particlegroup = None
 
     def __init__(self, *args):
         super(Rocket, self).__init__(*args)
-        psystem = self.squid.world.particles
-        self.particlegroup = ParticleGroup(
-            renderer=self.particle_renderer,
-            controllers=self.particle_controllers,
-            system=psystem
-        )
-
         self.emitter = None
 
-    def __del__(self):
-        self.particlegroup.system.remove_group(self.particlegroup)
+    def get_particlegroup(self):
+        if self.particlegroup is None:
+            self.particlegroup = self.squid.world.particles.new_group(
+                'rocket',
+                renderer=self.particle_renderer,
+                controllers=self.particle_controllers,
+            )
+        return self.particlegroup
+
+    def release(self):
+        g = self.particlegroup
+        if g is not None:
+            if g.system is not None:
+                g.system.release(g)
+            self.particlegroup = None
 
     def controller(self):
         return OneTimeController(self)
@@ -176,61 +167,48 @@ class Rocket(ActiveSound, Engine):
             self.on_start()
             
             # Stuff in any numbers for now, update later
-            self.vel_domain = domain.Disc(
-                (0, 0, 0),
-                (0, 0, 1),
-                100
-            )
-            self.pos_domain = domain.Cone(
-                (0, 0, 0),
-                (-1, 0, 0),
-                1
-            )
-            self.template = Particle(
-                size=(20.0, 20.0, 0),
+            self.vel_domain = particles.Disc((0, 0), 100)
+            self.pos_domain = particles.Cone((0, 0), (-1, 0), 1)
+            self.template = particles.Particle(
+                size=20.0,
                 color=(1.0, 0.5, 0.0, 1.0),
             )
-            self.emitter = StaticEmitter(
+            self.emitter = particles.StaticEmitter(
                 position=self.pos_domain,
                 velocity=self.vel_domain,
                 template=self.template,
                 rate=30,
                 time_to_live=self.BURN_TIME,
             )
-            self.particlegroup.bind_controller(self.emitter)
+            self.get_particlegroup().bind_controller(self.emitter)
 
     def update_emitter(self, dt):
-        tv = v(-100, 0).rotated(math.degrees(self.rotation))  # thrust vel
+        tv = v(-100, 0).rotated_rad(self.rotation)  # thrust vel
         bv = v(self.squid.body.velocity)  # body vel
 
         ve = (tv + bv) * 0.5  # velocity of emitted particles
-        self.vel_domain.center = (ve.x, ve.y, 0)
+        self.vel_domain.center = (ve.x, ve.y)
 
         pos = self.position
         cone = ve * dt
         if cone.length2 < 0.001:
             cone = tv * 0.1
         base = pos + cone
-        self.pos_domain.apex = (pos.x, pos.y, 0)
-        self.pos_domain.base = (base.x, base.y, 0)
+        self.pos_domain.apex = (pos.x, pos.y)
+        self.pos_domain.base = (base.x, base.y)
         self.pos_domain.outer_radius = cone.length * 0.2
     
-    def update(self, dt):
+    def thrusting(self):
+        return self.active and self.time_left > 0
+
+    def prepare(self, dt):
         if self.active:
             self.time_left -= dt
             if self.time_left > 0:
                 self.update_emitter(dt)
-                super(Rocket, self).update(dt)
             else:
                 self.on_stop()
 
-    def draw_particles(self):
-        self.particlegroup.draw()
-
-    def draw(self):
-        self.draw_particles()
-        super(Rocket, self).draw()
-
 
 
 
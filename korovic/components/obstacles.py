@@ -1,10 +1,10 @@
 import math
-import pyglet.sprite
 
 from .base import Component
 from .squid import Tether
 
 from ..vector import v
+from ..headless import Sprite
 
 
 class BarrageBalloon(Component):
@@ -12,9 +12,10 @@ class BarrageBalloon(Component):
     LIFT = v(0, 100000)
     MASS = 50
     collision_group = 2
+    tether_class = Tether
 
     def __init__(self):
-        self.sprite = pyglet.sprite.Sprite(self.image, 0, 0)
+        self.sprite = Sprite(self.image, 0, 0)
         self.create_body()
         self.tether = None
 
@@ -25,8 +26,9 @@ class BarrageBalloon(Component):
         return bs
 
     def tether_to(self, body, alt):
+        self.anchor = v(body.position)
         self.body.position = body.position + v(0, alt)
-        self.tether = Tether(
+        self.tether = self.tether_class(
             a=self.body.local_to_world(-self.insertion_point),
             b=v(body.position),
             c1=self.body,
@@ -38,6 +40,7 @@ class BarrageBalloon(Component):
     def update(self, dt):
         self.body.reset_forces()
         self.body.apply_force(self.LIFT)
+        self.tether.update(dt)
 
     @property
     def position(self):
@@ -47,6 +50,29 @@ class BarrageBalloon(Component):
     def rotation(self):
         return self.body.angle
 
+    def set_layers(self, layers):
+        self.layers = layers
+        if layers is None:
+            self.sprite.batch = None
+            self.sprite.group = None
+            self.tether.set_batch(None)
+        else:
+            self.sprite.group = layers.actors
+            self.sprite.batch = layers.batch
+            self.tether.set_batch(layers.batch, layers.tethers)
+
+    def set_visible(self, visible):
+        super(BarrageBalloon, self).set_visible(visible)
+        self.tether.set_visible(visible)
+
+    def delete(self):
+        self.sprite.delete()
+        self.tether.delete()
+
+    def update_sprite(self):
+        self.tether.update_vertices()
+        super(BarrageBalloon, self).update_sprite()
+
     def draw(self):
         self.tether.draw()
         self.draw_component()
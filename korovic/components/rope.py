@@ -0,0 +1,199 @@
+"""A tether simulated as a Verlet rope, outside pymunk.
+
+Tether builds a pymunk body, shape and joint per segment, which are costly
+for the solver when barrage balloons have long tethers. VerletTether keeps
+its points in a numpy array instead, integrates them with position-based
+Verlet and satisfies the segment lengths by projection. It has no pymunk
+objects at all: it only pulls on the bodies at its ends, with a damped
+spring force when it is stretched taut.
+
+For the forces the rope is treated as massless; its weight only shapes how
+it hangs. It must be updated each tick, after the forces on the end bodies
+have been reset.
+
+To use it in place of Tether, set tether_class on the component, eg. ::
+
+    BarrageBalloon.tether_class = VerletTether
+
+"""
+import math
+
+import numpy
+import pymunk
+
+from ..constants import TARGET_FPS
+from ..vector import v
+from .squid import TetherLine
+
+
+class VerletTether(TetherLine):
+    GRAVITY = (0, -900.0)
+
+    # How fast the spring coupling the rope to the end bodies may oscillate,
+    # relative to the tick rate; higher is stiffer but less stable
+    STIFFNESS = 0.3
+
+    # Damping ratio of the spring
+    DAMPING_RATIO = 0.7
+
+    def __init__(self, a, b, c1=None, c2=None, segments=10, density=0.01,
+            colour=(0, 0, 0, 1), thickness=4, iterations=10, damping=0.98):
+        """Tether between points a and b.
+
+        If c1 and c2 are given, these are the bodies each end is attached to.
+        density is accepted for compatibility with Tether and ignored.
+
+        """
+        self.colour = colour
+        self.thickness = thickness
+        self.segments = segments
+        self.iterations = iterations
+        self.damping = damping
+        self.gravity = numpy.array(self.GRAVITY)
+
+        a = v(a)
+        b = v(b)
+        self.length = (b - a).length
+        self.segment_length = self.length / segments
+
+        self.c1 = c1
+        self.c2 = c2
+        self.anchor1 = v(c1.world_to_local(a)) if c1 else a
+        self.anchor2 = v(c2.world_to_local(b)) if c2 else b
+
+        # The ends are pinned to their anchors; only the rest move freely
+        self.inv_mass = numpy.ones(segments + 1)
+        self.inv_mass[[0, -1]] = 0
+
+        self.points = numpy.zeros((segments + 1, 2))
+        self.previous = self.points
+        self.reorient(a, b)
+
+        self.stiffness, self.spring_damping = self.spring_constants()
+        self.set_batch(None)
+
+    def spring_constants(self):
+        """Choose the spring constant and damping for the end bodies' masses."""
+        masses = [
+            c.mass for c in (self.c1, self.c2)
+            if c is not None and c.mass != pymunk.inf
+        ]
+        if not masses:
+            return 0, 0
+        m = min(masses)
+        omega = self.STIFFNESS * TARGET_FPS
+        k = m * omega * omega
+        return k, 2 * self.DAMPING_RATIO * math.sqrt(k * m)
+
+    def bodies_and_shapes(self):
+        return []
+
+    def ends(self):
+        """The current world positions of the ends of the tether."""
+        a = self.c1.local_to_world(self.anchor1) if self.c1 else self.anchor1
+        b = self.c2.local_to_world(self.anchor2) if self.c2 else self.anchor2
+        return v(a), v(b)
+
+    def reorient(self, a, b):
+        """Move points into a line between a and b, at rest."""
+        t = numpy.linspace(0, 1, self.segments + 1)[:, numpy.newaxis]
+        self.points = (1 - t) * numpy.array(a) + t * numpy.array(b)
+        self.previous = self.points.copy()
+        if self.vertices is not None:
+            self.update_vertices()
+
+    def get_state(self):
+        return self.points.copy(), self.previous.copy()
+
+    def restore(self, state):
+        points, previous = state
+        self.points[:] = points
+        self.previous = previous.copy()
+
+    def update(self, dt):
+        a, b = self.ends()
+        self.integrate(dt, a, b)
+        for i in xrange(self.iterations):
+            self.constrain(0)
+            self.constrain(1)
+        self.apply_forces(a, b)
+
+    def integrate(self, dt, a, b):
+        p = self.points
+        vel = (p - self.previous) * self.damping
+        self.previous = p.copy()
+        p += vel + self.gravity * (dt * dt)
+        p[0] = a
+        p[-1] = b
+
+    def constrain(self, parity):
+        """Pull together the ends of every other segment that is too long.
+
+        Segments of the same parity share no points, so each half can be
+        projected at once.
+
+        """
+        p = self.points
+        i = numpy.arange(parity, self.segments, 2)
+        j = i + 1
+        d = p[j] - p[i]
+        dist = numpy.sqrt((d * d).sum(axis=1))
+        wi = self.inv_mass[i]
+        wj = self.inv_mass[j]
+        w = wi + wj
+        stretch = dist - self.segment_length
+        # A rope resists stretching but not compression
+        taut = (stretch > 0) & (w > 0)
+        if not taut.any():
+            return
+        d = d[taut]
+        s = (stretch[taut] / (dist[taut] * w[taut]))[:, numpy.newaxis]
+        p[i[taut]] += d * s * wi[taut][:, numpy.newaxis]
+        p[j[taut]] -= d * s * wj[taut][:, numpy.newaxis]
+
+    def apply_forces(self, a, b):
+        """Pull the end bodies together if the rope is stretched taut."""
+        if not self.stiffness:
+            return
+        axis = b - a
+        dist = axis.length
+        if dist <= self.length:
+            return
+        n = axis / dist
+        va = v(self.c1.velocity) if self.c1 else v(0, 0)
+        vb = v(self.c2.velocity) if self.c2 else v(0, 0)
+        separating = (vb - va).dot(n)
+        f = self.stiffness * (dist - self.length) + self.spring_damping * separating
+        if f <= 0:
+            return
+        if self.c1 and self.c1.mass != pymunk.inf:
+            self.c1.apply_force(n * f, a - v(self.c1.position))
+        if self.c2 and self.c2.mass != pymunk.inf:
+            self.c2.apply_force(n * -f, b - v(self.c2.position))
+
+    # The vertex list's array, and a numpy view of it as one row per segment
+    _vertex_array = None
+    _vertex_view = None
+
+    def line_vertices(self):
+        p = self.points
+        vs = numpy.empty((self.segments, 4))
+        vs[:, :2] = p[:-1]
+        vs[:, 2:] = p[1:]
+        return vs.ravel().tolist()
+
+    def update_vertices(self):
+        """Write the points straight into the vertex list's array."""
+        if not self.visible:
+            super(VerletTether, self).update_vertices()
+            return
+        # Getting the array also marks it to be uploaded again; pyglet hands
+        # back the same one until the vertex list moves
+        array = self.vertices.vertices
+        if array is not self._vertex_array:
+            self._vertex_array = array
+            self._vertex_view = numpy.ctypeslib.as_array(array).reshape(-1, 4)
+        p = self.points
+        vs = self._vertex_view
+        vs[:, :2] = p[:-1]
+        vs[:, 2:] = p[1:]
@@ -1,14 +1,16 @@
 import math
 import pymunk
-import pyglet.sprite
-import pyglet.graphics
 from pyglet import gl
 from .base import Component
 
-from ..constants import SEA_LEVEL, TARGET_FPS
+from ..constants import SEA_LEVEL, TARGET_FPS, COLLISION_SQUID
 
 from .. import loader
 from ..vector import v
+from ..headless import Sprite, vertex_list
+from ..snapshot import SquidSnapshot
+from ..layers import LineGroup
+from .arrays import ComponentArrays
 
 
 class Slot(object):
@@ -42,9 +44,13 @@ class Slots(object):
         self.slots.append(s)
 
     def detach_all(self):
+        for c in self.components:
+            c.set_layers(None)
+            c.release()
         self.components = []
         for s in self.slots:
             s.component = None
+        self.squid.components_changed()
 
     def slot_position(self, id):
         s = self.slots[id]
@@ -73,6 +79,8 @@ class Slots(object):
         self.components.append(component)
         self.components.sort(key=lambda c: bool(c.slot_mask & Slot.SIDE))
         component.attach_at_slot(self.slots[id])
+        component.set_layers(self.squid.layers)
+        self.squid.components_changed()
 
     def attach_new(self, id, component_class):
         """Attach a new instance of component_class at id"""
@@ -87,6 +95,9 @@ class Slots(object):
                 s.component = None
         self.components.remove(component)
         component.slot = None
+        component.set_layers(None)
+        component.release()
+        self.squid.components_changed()
 
     def has(self, class_):
         """Determine if this squid has an instance of a component class attached.
@@ -110,6 +121,7 @@ class Susie(Component):
     MASS = 25
     ANGULAR_VELOCITY_DAMPING = 0.8
     money = 0
+    arrays = None
 
     @classmethod
     def load(cls):
@@ -122,8 +134,8 @@ class Susie(Component):
 
     def __init__(self, world):
         self.world = world
-        self.sprite = pyglet.sprite.Sprite(self.image, 0, 0)
-        self.shadow = pyglet.sprite.Sprite(self.shadow_image, 0, 0)
+        self.sprite = Sprite(self.image, 0, 0)
+        self.shadow = Sprite(self.shadow_image, 0, 0)
         
         self.slots = Slots(self)
         self.slots.add_slot(self.circles[2][0], Slot.SIDE)
@@ -148,9 +160,16 @@ class Susie(Component):
     
     def create_body(self):
         super(Susie, self).create_body()
+        # A point at Susie's centre, for the World's sea and goal sensors
+        sensor = pymunk.Circle(self.body, 1)
+        sensor.sensor = True
+        sensor.collision_type = COLLISION_SQUID
+        self.shapes.append(sensor)
         self.spikes = [ 
 #            TentacleSpike(self, v(-90, 0)),
         ]
+        for s in self.spikes:
+            s.set_layers(self.layers)
 
     def reset(self, position=(250, 80)):
         self.create_body()
@@ -160,6 +179,8 @@ class Susie(Component):
         self.position = position
         for a in self.slots.components:
             a.reset()
+        self.components_changed()
+        self.set_visible(True)
 
     def draw_fuel(self, amount):
         if amount == 0:
@@ -206,6 +227,27 @@ class Susie(Component):
 
     rotation = property(get_rotation, set_rotation)
 
+    def loadout(self):
+        """Describe the attached components as (class, slot id, angle) tuples."""
+        return [(c.__class__, c.slot.id, c.angle) for c in self.slots.components]
+
+    def fit(self, loadout):
+        """Replace the attached components with loadout, as given by loadout().
+
+        An angle of None keeps the component's default angle for its slot.
+
+        """
+        self.slots.detach_all()
+        for component_class, slot, angle in loadout:
+            self.attach(component_class, slot)
+            c = self.slots.slots[slot].component
+            if angle is not None and c.angle != angle:
+                c.angle = angle
+
+    def snapshot(self):
+        """Record Susie's current state, to restore in place later."""
+        return SquidSnapshot(self)
+
     def total_weight(self):
         return sum([c.MASS for c in self.slots.components], self.MASS)
 
@@ -226,14 +268,62 @@ class Susie(Component):
             if c:
                 yield c
 
+    def components_changed(self):
+        """Discard the component arrays, after the loadout or its state changes."""
+        self.arrays = None
+
     def update(self, dt):
         self.body.reset_forces()
         for s in self.spikes:
             s.update(dt)
-        for a in self.slots.components:
-            a.update(dt)
+        if self.arrays is None:
+            self.arrays = ComponentArrays(self)
+        self.arrays.update(dt)
         self.body.angular_velocity *= self.ANGULAR_VELOCITY_DAMPING
 
+    def set_layers(self, layers):
+        """Keep Susie's sprites, and those of all her parts, in layers."""
+        self.layers = layers
+        if layers is None:
+            for s in self.sprite, self.shadow:
+                s.batch = None
+                s.group = None
+        else:
+            self.shadow.group = layers.shadow
+            self.shadow.batch = layers.batch
+            self.sprite.group = layers.body
+            self.sprite.batch = layers.batch
+        for s in self.spikes:
+            s.set_layers(layers)
+        for c in self.slots.components:
+            c.set_layers(layers)
+
+    def set_visible(self, visible):
+        self.sprite.visible = visible
+        self.shadow.visible = visible and self.body.position.y > SEA_LEVEL
+        for s in self.spikes:
+            s.set_visible(visible)
+        for c in self.slots.components:
+            c.set_visible(visible)
+
+    def update_shadow(self):
+        if self.body.position.y > SEA_LEVEL:
+            self.shadow.set_position(self.body.position.x, SEA_LEVEL + 23)
+            self.shadow.opacity = max(255 - self.body.position.y, 0)
+            self.shadow.visible = True
+        else:
+            self.shadow.visible = False
+
+    def update_sprite(self):
+        """Move all of Susie's sprites into place, to draw her in a batch."""
+        self.update_shadow()
+        for s in self.spikes:
+            s.update_sprite()
+        self.sprite.set_position(*self.body.position)
+        self.sprite.rotation = -180 / math.pi * self.body.angle
+        for a in self.slots.components:
+            a.update_sprite()
+
     def draw_component(self, selected=None):
         for s in self.spikes:
             s.draw()
@@ -242,9 +332,8 @@ class Susie(Component):
         self.sprite.draw()
 
     def draw_shadow(self):
-        if self.body.position.y > SEA_LEVEL:
-            self.shadow.set_position(self.body.position.x, SEA_LEVEL + 23)
-            self.shadow.opacity = max(255 - self.body.position.y, 0)
+        self.update_shadow()
+        if self.shadow.visible:
             self.shadow.draw()
 
     def draw(self):
@@ -306,12 +395,97 @@ class TentacleSpike(Component):
     def rotation(self):
         return self.body.angle
 
+    def set_layers(self, layers):
+        self.layers = layers
+        if layers is None:
+            self.sprite.batch = None
+            self.sprite.group = None
+            self.tether.set_batch(None)
+        else:
+            self.sprite.group = layers.spikes
+            self.sprite.batch = layers.batch
+            self.tether.set_batch(layers.batch, layers.spike_tethers)
+
+    def set_visible(self, visible):
+        super(TentacleSpike, self).set_visible(visible)
+        self.tether.set_visible(visible)
+
+    def update_sprite(self):
+        self.tether.update_vertices()
+        super(TentacleSpike, self).update_sprite()
+
     def draw(self):
         self.tether.draw()
         super(TentacleSpike, self).draw()
 
 
-class Tether(object):
+class TetherLine(object):
+    """Drawing for a tether, as a line through a list of points.
+
+    Subclasses set colour, thickness and segments, and override
+    line_vertices() to give the ends of each segment.
+
+    """
+    visible = True
+    vertices = None
+
+    def set_batch(self, batch, group=None):
+        """Draw the tether as part of batch, or on its own if batch is None.
+
+        The tether is drawn as GL_LINES, one line per segment, so that it can
+        share a batch with other tethers.
+
+        """
+        self.group = LineGroup(self.colour, self.thickness, group)
+        count = self.segments * 2
+        if self.vertices is not None:
+            self.vertices.delete()
+        if batch is None:
+            self.vertices = vertex_list(count, 'v2f/stream')
+        else:
+            self.vertices = batch.add(count, gl.GL_LINES, self.group, 'v2f/stream')
+        self.update_vertices()
+
+    def delete(self):
+        self.vertices.delete()
+
+    def update(self, dt):
+        """Tethers that aren't simulated by pymunk can override this."""
+
+    def get_state(self):
+        """Record any state the tether keeps outside its pymunk bodies."""
+
+    def restore(self, state):
+        """Put back the state recorded by get_state()."""
+
+    def line_vertices(self):
+        """Return a flat list of x1, y1, x2, y2 for each segment.
+
+        By default every segment is collapsed to the origin, so nothing is
+        drawn.
+
+        """
+        return [0] * (self.segments * 4)
+
+    def update_vertices(self):
+        """Copy the tether's points into its vertex list."""
+        if not self.visible:
+            self.vertices.vertices = [0] * (self.segments * 4)
+        else:
+            self.vertices.vertices = self.line_vertices()
+
+    def set_visible(self, visible):
+        self.visible = visible
+        self.update_vertices()
+
+    def draw(self):
+        self.update_vertices()
+        self.group.set_state_recursive()
+        self.vertices.draw(gl.GL_LINES)
+        self.group.unset_state_recursive()
+
+
+class Tether(TetherLine):
     def __init__(self, a, b, c1=None, c2=None, segments=10, density=0.01, colour=(0, 0, 0, 1), thickness=4):
         """Tether between points a and b.
 
@@ -322,31 +496,51 @@ class Tether(object):
         self.thickness = thickness
         self.shapes = []
         self.bodies = []
-        self.joints = []
+        self.c1 = c1
+        self.c2 = c2
         a = v(a)
         b = v(b)
-        segment_length = (b - a).length / segments
+        self.segment_length = (b - a).length / segments
         for i in xrange(segments + 1):
             frac = float(i) / segments
             pos = frac * b + (1 - frac) * a
-            body = self.create_node(pos)
-            if self.bodies:
-                last = self.bodies[-1]
-                self.joints.append(pymunk.SlideJoint(last, body, (0, 0), (0, 0), 0, segment_length))
-            self.bodies.append(body)
-        if c1:
-            self.joints.append(
-                pymunk.PivotJoint(c1, self.bodies[0], self.bodies[0].position),
+            self.bodies.append(self.create_node(pos))
+        self.joints = self.create_joints()
+
+        self.segments = segments
+        self.set_batch(None)
+
+    def create_joints(self):
+        """Joint the nodes to each other, and the ends to c1 and c2.
+
+        The ends are pinned where they are now.
+
+        """
+        joints = []
+        for last, body in zip(self.bodies, self.bodies[1:]):
+            joints.append(pymunk.SlideJoint(last, body, (0, 0), (0, 0), 0, self.segment_length))
+        if self.c1:
+            joints.append(
+                pymunk.PivotJoint(self.c1, self.bodies[0], self.bodies[0].position),
             )
-        if c2:
-            self.joints.append(
-                pymunk.PivotJoint(c2, self.bodies[-1], self.bodies[-1].position),
+        if self.c2:
+            joints.append(
+                pymunk.PivotJoint(self.c2, self.bodies[-1], self.bodies[-1].position),
             )
 
-        for j in self.joints:
+        for j in joints:
             j.error_bias = 0.9 ** 30.0
+        return joints
 
-        self.vertices = pyglet.graphics.vertex_list(len(self.bodies), 'v2f')
+    def restore(self, state):
+        """Replace the joints once the nodes are back where they started.
+
+        pymunk joints remember the impulses they last applied, and there's
+        no way to clear them, so new ones start afresh. The tether must be
+        out of the space.
+
+        """
+        self.joints = self.create_joints()
 
     def reorient(self, a, b):
         """Move bodies into a line between a and b"""
@@ -355,31 +549,19 @@ class Tether(object):
             pos = frac * b + (1 - frac) * a
             body.position = pos
             body.velocity = v(0, 0)
-        self.set_vertex_list(a, b)
+        self.update_vertices()
 
     def bodies_and_shapes(self):
         return self.bodies + self.shapes + self.joints
 
-    def set_vertex_list(self, a, b):
-        vs = []
-        for i, body in enumerate(self.bodies):
-            frac = float(i) / (len(self.bodies) - 1)
-            pos = frac * b + (1 - frac) * a
-            vs.extend(list(pos))
-        self.vertices.vertices = vs
-
-    def build_vertex_list(self):
+    def line_vertices(self):
         vs = []
-        for b in self.bodies:
-            vs.extend(list(b.position))
-        self.vertices.vertices = vs
-
-    def draw(self):
-        self.build_vertex_list()
-        gl.glColor4f(*self.colour)
-        gl.glLineWidth(self.thickness)
-        self.vertices.draw(gl.GL_LINE_STRIP) 
-        gl.glLineWidth(1)
+        last = self.bodies[0].position
+        for b in self.bodies[1:]:
+            p = b.position
+            vs.extend((last.x, last.y, p.x, p.y))
+            last = p
+        return vs
 
     def create_node(self, pos):
         body = pymunk.Body(self.density, self.density)
@@ -7,9 +7,49 @@ from ..constants import SEA_LEVEL
 
 from .base import Component, ActivateableComponent
 from .squid import Slot
+from .arrays import WING
+from .aero import AeroTable
 
 
-class Wing(Component):
+class Aerofoil(object):
+    """Look up lift coefficients against angle of attack.
+
+    The tables are built from the formulas when the class is loaded.
+
+    """
+    # Wings stall beyond this angle of attack, in degrees
+    STALL_ANGLE = 45
+    AOA_STEP = 0.5
+
+    # Compute coefficients from the formulas rather than the tables
+    reference = False
+
+    @classmethod
+    def load(cls):
+        super(Aerofoil, cls).load()
+        cls.build_tables()
+
+    @classmethod
+    def build_tables(cls):
+        a = cls.STALL_ANGLE
+        cls.lift_table = AeroTable(cls.lift_formula, -a, a, cls.AOA_STEP)
+
+    @classmethod
+    def lift_formula(cls, aoa):
+        return cls.LIFT_RATE * math.sin(2 * math.radians(aoa + 5))
+
+    def lift_coefficient(self, aoa):
+        if self.reference:
+            return self.lift_formula(aoa)
+        return self.lift_table(aoa)
+
+    def lift(self, aoa, speed2):
+        """The lift force, in component space."""
+        coeff = self.lift_coefficient(aoa)
+        return v(0, max(-self.MAX_LIFT, min(self.MAX_LIFT, coeff * speed2)))
+
+
+class Wing(Aerofoil, Component):
     MASS = 15
     slot_mask = Slot.SIDE
 
@@ -17,10 +57,8 @@ class Wing(Component):
     LIFT_RATE = 5  # a number representing the relative wing area etc
     DRAG = 0.1
 
-    def draw_component(self):
-        self.sprite.set_position(*self.position)
-        self.sprite.rotation = -180 / math.pi * (self.angle + self.squid.body.angle)
-        self.sprite.draw()
+    # update() is kept as the reference for ComponentArrays.wing_forces()
+    force_model = WING
 
     def update(self, dt):
         # Drag
@@ -29,10 +67,8 @@ class Wing(Component):
         # Lift
         wind = self.relative_wind()
         aoa = -(-wind).angle
-        if wind.length2 > 1 and -45 < aoa < 45:
-            coeff = self.LIFT_RATE * math.sin(2 * math.radians(aoa + 5))
-            lift = v(0, max(-self.MAX_LIFT, min(self.MAX_LIFT, coeff * wind.length2)))
-            self.apply_force(lift)
+        if wind.length2 > 1 and -self.STALL_ANGLE < aoa < self.STALL_ANGLE:
+            self.apply_force(self.lift(aoa, wind.length2))
 
     def controller(self):
         return None
@@ -65,13 +101,29 @@ class Aerolon(Wing, ActivateableComponent):
     DRAG = 0.05
     
     MAX_LIFT = 20000
+    force_model = None
+
+    @classmethod
+    def build_tables(cls):
+        super(Aerolon, cls).build_tables()
+        cls.deflection_table = AeroTable(cls.deflection_formula, 0, 180, cls.AOA_STEP)
+
+    @classmethod
+    def deflection_formula(cls, rotation):
+        return math.sin(-0.5 * math.radians(rotation))
+
+    def deflection(self, rotation):
+        """The lift coefficient of the flap, for rotation in [0, 180)."""
+        if self.reference:
+            return self.deflection_formula(rotation)
+        return self.deflection_table(rotation)
 
     def update(self, dt):
         super(Aerolon, self).update(dt)
         if self.active:
             wind = self.relative_wind()
             x2 = wind.x * wind.x
-            force = math.sin(-0.5 * math.radians(self.rotation % 180))
+            force = self.deflection(self.rotation % 180)
             lift = max(self.MAX_LIFT, force * self.LIFT_RATE * x2)
             self.apply_force_relative(v(0, lift)) 
 
@@ -79,27 +131,46 @@ class Aerolon(Wing, ActivateableComponent):
         return PressController(self)
 
 
-class Ekranoplan(Component):
+class Ekranoplan(Aerofoil, Component):
     MASS = 15
     MAX_LIFT = 200000
     LIFT_RATE = 7
     DRAG = 0.1
     TORQUE_SCALE = 8
 
+    # The altitude above the sea at which ground effect is lost
+    GROUND_EFFECT_HEIGHT = 100.0
+
     slot_mask = Slot.BOTTOM
 
+    @classmethod
+    def build_tables(cls):
+        super(Ekranoplan, cls).build_tables()
+        cls.ground_effect_table = AeroTable(
+            cls.ground_effect_formula, 0, cls.GROUND_EFFECT_HEIGHT, 1
+        )
+
+    @classmethod
+    def ground_effect_formula(cls, alt):
+        return max(0, 1 - (alt / cls.GROUND_EFFECT_HEIGHT) ** 2)
+
+    def ground_effect(self, alt):
+        """How much of the lift remains at altitude alt above the sea."""
+        if self.reference:
+            return self.ground_effect_formula(alt)
+        return self.ground_effect_table(alt)
+
     def update(self, dt):
+        wind = self.relative_wind()
+        aoa = -(-wind).angle
+
         # Drag
         self.apply_force_absolute(self.absolute_wind() * -self.DRAG)
 
         # Lift
-        wind = self.relative_wind()
-        aoa = -(-wind).angle
-        if wind.length2 > 1 and -45 < aoa < 45:
-            coeff = self.LIFT_RATE * math.sin(2 * math.radians(aoa + 5))
-            lift = v(0, max(-self.MAX_LIFT, min(self.MAX_LIFT, coeff * wind.length2)))
+        if wind.length2 > 1 and -self.STALL_ANGLE < aoa < self.STALL_ANGLE:
             alt = self.position.y - SEA_LEVEL
-            scale = max(0, 1 - (alt / 100.0) ** 2)
             if alt > 0:
-                self.apply_force(lift * scale)
+                scale = self.ground_effect(alt)
+                self.apply_force(self.lift(aoa, wind.length2) * scale)
                 self.apply_torque(-self.rotation * scale * self.TORQUE_SCALE)
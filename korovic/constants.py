@@ -5,5 +5,10 @@ TARGET_FPS = 30.0
 SEA_LEVEL = 15
 HORIZON_LEVEL = 84
 
+# pymunk collision types of the sensors that detect crashes and wins
+COLLISION_SQUID = 1
+COLLISION_SEA = 2
+COLLISION_GOAL = 3
+
 SELECTED_COLOUR = (0, 255, 0)
 WHITE = (255, 255, 255)
@@ -7,16 +7,23 @@ import pyglet.clock
 from .world import World
 from .scene import Scene, Editor, TitleScreen
 from .cutscene import intro, level_start
+from .replay import FileRecorder
 
 
 from .constants import SCREEN_SIZE, TARGET_FPS, NAME
 
 
 class Game(object):
-    def start(self, level=1):
+    def start(self, level=1, record=None):
+        """Start the game.
+
+        If record is given, each flight is saved as a replay in that directory.
+
+        """
         w, h = SCREEN_SIZE
         self.window = pyglet.window.Window(width=w, height=h, caption=NAME)
-        self.game = self.scene = Scene(self, level=level)
+        recorder = FileRecorder(record) if record else None
+        self.game = self.scene = Scene(self, level=level, recorder=recorder)
         self.squid = self.game.world.squid
         self.editor = Editor(self, self.game.world)
         gl.glEnable(gl.GL_DEPTH_TEST)
@@ -0,0 +1,103 @@
+"""Stateless, counter-based random numbers for procedural content.
+
+Each cell of a procedurally generated space gets a 64-bit key hashed from its
+integer coordinates and a seed. The n-th random number for the cell is then
+the n-th output of SplitMix64 started from that key, which can be computed
+directly, so there is no generator state to create or seed, and a whole row of
+cells can be generated at once with numpy.
+
+The numbers depend only on integer arithmetic, so unlike seeding
+random.Random with hash() they are the same on every platform and Python
+version.
+
+"""
+import numpy
+
+
+MASK = (1 << 64) - 1
+GAMMA = 0x9E3779B97F4A7C15
+M1 = 0xBF58476D1CE4E5B9
+M2 = 0x94D049BB133111EB
+
+# 2 ** -53, to turn the top 53 bits of a hash into a float in [0, 1)
+FLOAT_SCALE = 1.0 / (1 << 53)
+
+
+def mix64(z):
+    """The SplitMix64 finaliser."""
+    z = ((z ^ (z >> 30)) * M1) & MASK
+    z = ((z ^ (z >> 27)) * M2) & MASK
+    return z ^ (z >> 31)
+
+
+def splitmix64(x):
+    """Hash the 64-bit integer x."""
+    return mix64((x + GAMMA) & MASK)
+
+
+def cell_key(cx, cy, seed=0):
+    """Compute the key for the cell with integer coordinates (cx, cy)."""
+    return splitmix64(splitmix64(splitmix64(seed) ^ (cx & MASK)) ^ (cy & MASK))
+
+
+class CellRandom(object):
+    """Random numbers for one cell, with the interface of random.Random.
+
+    Only the methods the background generators use are provided.
+
+    """
+    __slots__ = 'key', 'counter'
+
+    def __init__(self, key):
+        self.key = key
+        self.counter = 0
+
+    def random(self):
+        self.counter += 1
+        z = mix64((self.key + self.counter * GAMMA) & MASK)
+        return (z >> 11) * FLOAT_SCALE
+
+    def uniform(self, a, b):
+        return a + (b - a) * self.random()
+
+    def choice(self, seq):
+        return seq[int(self.random() * len(seq))]
+
+    def randint(self, a, b):
+        return a + int(self.random() * (b - a + 1))
+
+
+# numpy versions of the above, operating on uint64 arrays
+
+_U = numpy.uint64
+
+
+def _mix64_array(z):
+    z = (z ^ (z >> _U(30))) * _U(M1)
+    z = (z ^ (z >> _U(27))) * _U(M2)
+    return z ^ (z >> _U(31))
+
+
+def _splitmix64_array(x):
+    return _mix64_array(x + _U(GAMMA))
+
+
+def _as_uint64(ints):
+    """Reinterpret signed integers as uint64, as & MASK does for Python ints."""
+    return numpy.asarray(ints, dtype=numpy.int64).view(numpy.uint64)
+
+
+def row_random(cxs, cy, n, seed=0):
+    """Compute the first n random() values for each cell (cx, cy) for cx in cxs.
+
+    Returns an array of shape (len(cxs), n), whose row i equals n successive
+    calls to CellRandom(cell_key(cxs[i], cy, seed)).random().
+
+    """
+    cy = _as_uint64([cy])[0]
+    with numpy.errstate(over='ignore'):
+        row_key = _splitmix64_array(_U(splitmix64(seed)) ^ _as_uint64(cxs))
+        keys = _splitmix64_array(row_key ^ cy)
+        counters = numpy.arange(1, n + 1, dtype=numpy.uint64) * _U(GAMMA)
+        z = _mix64_array(keys[:, numpy.newaxis] + counters[numpy.newaxis, :])
+    return (z >> _U(11)).astype(numpy.float64) * FLOAT_SCALE
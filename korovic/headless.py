@@ -0,0 +1,78 @@
+"""Support for running the simulation without a display or audio device.
+
+Set KOROVIC_HEADLESS=1 in the environment before korovic is imported. Sprites,
+vertex lists and sounds are then replaced by null objects, and flights can be
+run with korovic.world.HeadlessWorld.
+
+"""
+import os
+
+
+HEADLESS = bool(os.environ.get('KOROVIC_HEADLESS'))
+
+
+class NullSprite(object):
+    """Stands in for pyglet.sprite.Sprite, accepting and ignoring everything."""
+    rotation = 0
+    scale = 1.0
+    opacity = 255
+    color = (255, 255, 255)
+    visible = True
+
+    def __init__(self, img, x=0, y=0, *args, **kwargs):
+        self.image = img
+        self.x = x
+        self.y = y
+
+    def set_position(self, x, y):
+        self.x = x
+        self.y = y
+
+    def _get_position(self):
+        return self.x, self.y
+
+    def _set_position(self, pos):
+        self.x, self.y = pos
+
+    position = property(_get_position, _set_position)
+
+    @property
+    def width(self):
+        return self.image.width * self.scale
+
+    @property
+    def height(self):
+        return self.image.height * self.scale
+
+    def draw(self):
+        pass
+
+    def delete(self):
+        pass
+
+
+class NullVertexList(object):
+    """Stands in for a pyglet vertex list."""
+    def __init__(self, count, *data):
+        self.count = count
+        self.vertices = []
+        self.colors = []
+        for fmt in data:
+            if isinstance(fmt, tuple):
+                fmt = fmt[0]
+            if fmt.startswith('v'):
+                self.vertices = [0.0] * (count * int(fmt[1]))
+
+    def draw(self, mode):
+        pass
+
+    def delete(self):
+        pass
+
+
+if HEADLESS:
+    Sprite = NullSprite
+    vertex_list = NullVertexList
+else:
+    from pyglet.sprite import Sprite
+    from pyglet.graphics import vertex_list
@@ -0,0 +1,88 @@
+"""The persistent Batch the World is drawn with, and its layers.
+
+Everything in the world keeps its sprites and vertex lists in this one batch
+and updates them in place each frame, so that the whole world can be drawn
+with batch.draw(). The layers are drawn in order, from the back:
+
+* background - level sprites such as islands and cities
+* tethers - barrage balloon cables
+* actors - barrage balloons
+* squid - Susie, split into sub-layers for her shadow, tentacles, body,
+  balloon tethers and components
+* particles - splashes and rocket exhaust
+
+Tethers are drawn behind the sprites they are attached to, as they were
+before batching. All but the background are drawn with depth testing, so
+that they are hidden beneath the sea.
+
+"""
+from pyglet import gl
+from pyglet.graphics import Batch, Group, OrderedGroup
+
+
+class DepthTestGroup(OrderedGroup):
+    """Draw children only where they are not behind the foreground sea."""
+    def set_state(self):
+        gl.glDepthFunc(gl.GL_LEQUAL)
+
+    def unset_state(self):
+        gl.glDepthFunc(gl.GL_ALWAYS)
+
+
+class BlendGroup(OrderedGroup):
+    """Draw children with alpha blending."""
+    def set_state(self):
+        gl.glEnable(gl.GL_BLEND)
+        gl.glBlendFunc(gl.GL_SRC_ALPHA, gl.GL_ONE_MINUS_SRC_ALPHA)
+
+    def unset_state(self):
+        gl.glDisable(gl.GL_BLEND)
+
+
+class LineGroup(Group):
+    """Draw lines of a given colour and thickness."""
+    def __init__(self, colour, thickness, parent=None):
+        super(LineGroup, self).__init__(parent)
+        self.colour = tuple(colour)
+        self.thickness = thickness
+
+    def set_state(self):
+        gl.glColor4f(*self.colour)
+        gl.glLineWidth(self.thickness)
+
+    def unset_state(self):
+        gl.glLineWidth(1)
+        gl.glColor4f(1, 1, 1, 1)
+
+    def __eq__(self, ano):
+        return (
+            self.__class__ is ano.__class__ and
+            self.colour == ano.colour and
+            self.thickness == ano.thickness and
+            self.parent == ano.parent
+        )
+
+    def __hash__(self):
+        return hash((self.colour, self.thickness, id(self.parent)))
+
+
+class Layers(object):
+    def __init__(self):
+        self.batch = Batch()
+
+        self.background = OrderedGroup(0)
+        world = DepthTestGroup(1)
+        self.tethers = OrderedGroup(0, world)
+        self.actors = OrderedGroup(1, world)
+        squid = OrderedGroup(2, world)
+        self.particles = BlendGroup(3, world)
+
+        self.shadow = OrderedGroup(0, squid)
+        self.spike_tethers = OrderedGroup(1, squid)
+        self.spikes = OrderedGroup(2, squid)
+        self.body = OrderedGroup(3, squid)
+        self.component_tethers = OrderedGroup(4, squid)
+        self.components = OrderedGroup(5, squid)
+
+    def draw(self):
+        self.batch.draw()
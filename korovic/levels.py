@@ -0,0 +1,154 @@
+"""Compile level SVGs into a compact, pre-resolved form.
+
+Levels are drawn in Inkscape, but parsing the SVG on every level change is
+slow. compile_svg() resolves everything the World needs to build a level, and
+load_level() caches the result, keyed on the SVG's content hash, both in
+memory and as JSON on disk, so that once a level has been compiled it can be
+loaded without touching XML at all.
+
+"""
+import os
+import re
+import json
+import hashlib
+from collections import namedtuple
+from xml.etree.ElementTree import fromstring
+from pkg_resources import resource_string, resource_listdir
+
+
+SVG_NS = '{http://www.w3.org/2000/svg}'
+XLINK_NS = '{http://www.w3.org/1999/xlink}'
+DC_NS = '{http://purl.org/dc/elements/1.1/}'
+
+DEFAULT_MONEY = 3000
+
+# Bump this when the compiled form changes, to invalidate the disk cache
+VERSION = 1
+
+CACHE_DIR = os.environ.get(
+    'KOROVIC_LEVEL_CACHE',
+    os.path.join(os.path.expanduser('~'), '.korovic', 'levels')
+)
+
+
+# islands and goals are lists of (x1, x2) spans, balloons is a list of
+# (x, altitude) positions, and sprites a list of (path, x, y). width is the
+# width of the level if there is a wall at the end, else None.
+Level = namedtuple('Level', 'title width height money islands goals balloons sprites')
+
+_cache = {}
+
+
+def compile_svg(svg):
+    """Compile the SVG source of a level into a Level."""
+    root = fromstring(svg)
+    width = w = int(root.get('width'))
+    h = int(root.get('height'))
+    title = root.find('.//%stitle' % SVG_NS).text
+    try:
+        money = int(root.find('.//%sidentifier' % DC_NS).text)
+    except AttributeError:
+        money = DEFAULT_MONEY
+
+    islands = []
+    goals = []
+    balloons = []
+    sprites = []
+    for im in root.findall('.//%simage' % SVG_NS):
+        mo = re.search(r'(?P<path>\w+/(?P<type>[\w-]+))\.png$', im.get(XLINK_NS + 'href'))
+        if not mo:
+            print "Unknown object", im
+            continue
+        type = mo.group('type')
+        path = mo.group('path')
+        x = int(float(im.get('x')))
+        ih = float(im.get('height'))
+        iw = int(float(im.get('width')))
+        y = h - int(float(im.get('y')) + ih)
+
+        if type == 'island-lair':
+            islands.append((x, x + iw))
+            sprites.append((path, x, y))
+        elif type == 'city':
+            islands.append((x, x + iw))
+            sprites.append((path, x, y))
+            goals.append((x, x + iw))
+            # Only if the city straddles the edge of the page
+            # Do we create a wall there
+            if x + iw < w:
+                width = None
+        elif type == 'barrageballoon':
+            balloons.append((x + iw * 0.5, y + ih * 0.7))
+        else:
+            print "Unknown object", path
+
+    if not goals:
+        width = None
+
+    return Level(title, width, h, money, islands, goals, balloons, sprites)
+
+
+def _cache_path(key):
+    return os.path.join(CACHE_DIR, '%s-v%d.json' % (key, VERSION))
+
+
+def _read_cache(key):
+    try:
+        with open(_cache_path(key)) as f:
+            data = json.load(f)
+    except (IOError, ValueError):
+        return None
+    return Level(
+        title=data['title'],
+        width=data['width'],
+        height=data['height'],
+        money=data['money'],
+        islands=[tuple(i) for i in data['islands']],
+        goals=[tuple(g) for g in data['goals']],
+        balloons=[tuple(b) for b in data['balloons']],
+        sprites=[tuple(s) for s in data['sprites']],
+    )
+
+
+def _write_cache(key, level):
+    """Save a compiled level; the cache is an optimisation, so ignore errors."""
+    try:
+        if not os.path.isdir(CACHE_DIR):
+            os.makedirs(CACHE_DIR)
+        with open(_cache_path(key), 'w') as f:
+            json.dump(level._asdict(), f)
+    except (IOError, OSError):
+        pass
+
+
+def load_level(name):
+    """Load the compiled form of the level called name.
+
+    Raises IOError if there is no such level.
+
+    """
+    svg = resource_string(__name__, 'data/levels/%s.svg' % name)
+    key = hashlib.sha1(svg).hexdigest()
+    try:
+        return _cache[key]
+    except KeyError:
+        pass
+    level = _read_cache(key)
+    if level is None:
+        level = compile_svg(svg)
+        _write_cache(key, level)
+    _cache[key] = level
+    return level
+
+
+def level_names():
+    """List the names of all levels."""
+    return sorted(
+        f[:-4] for f in resource_listdir(__name__, 'data/levels')
+        if f.endswith('.svg')
+    )
+
+
+def compile_all():
+    """Compile and cache all levels, eg. to warm the cache for batch runs."""
+    return dict((name, load_level(name)) for name in level_names())
@@ -1,7 +1,10 @@
 import pyglet.resource
+import pyglet.image
 from pyglet import font
 from pkg_resources import resource_stream
 
+from .headless import HEADLESS
+
 
 class Loader(pyglet.resource.Loader):
     def file(self, name, mode='rb'):
@@ -9,9 +12,18 @@ class Loader(pyglet.resource.Loader):
         return resource_stream(__name__, name)
 
 
-loader = Loader()
+class HeadlessLoader(Loader):
+    def image(self, name, flip_x=False, flip_y=False, rotate=0):
+        """Load image data only; textures can't be created without a GL context."""
+        return pyglet.image.load(name, file=self.file(name))
+
+
+if HEADLESS:
+    loader = HeadlessLoader()
+else:
+    loader = Loader()
+    font.add_file(resource_stream(__name__, 'data/fonts/atomic-clock-radio.ttf'))
+
 image = loader.image
 texture = loader.texture
 file = loader.file
-
-font.add_file(resource_stream(__name__, 'data/fonts/atomic-clock-radio.ttf'))
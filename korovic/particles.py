@@ -0,0 +1,583 @@
+"""A particle system storing particles as numpy arrays.
+
+This replaces the parts of lepton the game used. Rather than a Python object
+per particle, a ParticleGroup keeps arrays of position, velocity, age, size
+and colour, and each controller updates every particle in the group in one
+vectorised pass.
+
+Everything is two dimensional; positions and velocities are (x, y).
+
+A ParticleSystem has a ParticleBudget capping how many particles may be alive
+at once. Emitters reserve particles from it before emitting, and emit fewer,
+shorter-lived particles as it fills up, so the cost of updating and drawing
+particles stays bounded however many emitters are running.
+
+"""
+import math
+import weakref
+
+import numpy
+from pyglet import gl
+from pyglet.graphics import TextureGroup
+
+from .headless import vertex_list
+
+
+class ParticleBudget(object):
+    """A cap on the number of particles alive at once across a system.
+
+    Above soft_limit live particles, the level of detail falls linearly from
+    1 to MIN_DETAIL at limit. Emitters scale their rate and their particles'
+    lifetimes by it. Reservations are never granted beyond limit.
+
+    """
+    MIN_DETAIL = 0.25
+
+    def __init__(self, limit=2000, soft_limit=None):
+        self.limit = limit
+        self.soft_limit = limit // 2 if soft_limit is None else soft_limit
+        self.live = 0
+
+    def detail(self):
+        if self.live <= self.soft_limit:
+            return 1.0
+        f = (self.limit - self.live) / float(self.limit - self.soft_limit)
+        return max(self.MIN_DETAIL, f)
+
+    def reserve(self, n):
+        """Reserve up to n particles, returning how many were granted."""
+        n = max(0, min(n, self.limit - self.live))
+        self.live += n
+        return n
+
+
+class ParticleSystem(object):
+    """A collection of particle groups updated and drawn together.
+
+    Groups that have had no particles and no emitter for retire_after seconds
+    are retired: they are no longer updated or drawn until an emitter is bound
+    to them again. A group obtained with new_group() can be handed back with
+    release() when its owner is done with it; once retired it is kept in a
+    pool for its effect type, to be reused by the next new_group() call for
+    that effect rather than allocating new arrays.
+
+    """
+    RETIRE_AFTER = 2.0
+
+    # How far outside the viewport particles may go before they are culled
+    CULL_MARGIN = 200
+
+    def __init__(self, retire_after=RETIRE_AFTER, budget=None, layers=None):
+        self.retire_after = retire_after
+        self.budget = budget or ParticleBudget()
+        self.layers = layers
+        self.viewport = None
+        self.groups = []
+        self.pools = {}  # effect: [retired, released groups]
+
+    def add_group(self, group):
+        group.system = self
+        group.active = True
+        group.idle = 0
+        self.groups.append(group)
+
+    def remove_group(self, group):
+        if group.active:
+            self.groups.remove(group)
+        group.system = None
+        group.active = False
+
+    def new_group(self, effect, controllers=(), renderer=None):
+        """Get a group for an effect, reusing a pooled one if possible."""
+        try:
+            group = self.pools[effect].pop()
+        except (KeyError, IndexError):
+            group = ParticleGroup(effect=effect)
+        group.controllers = list(controllers)
+        group.renderer = renderer
+        group.clear()
+        self.add_group(group)
+        return group
+
+    def release(self, group):
+        """Return group to the pool once its particles have died."""
+        group.released = True
+        if not group.active:
+            # Already retired, so it won't be again
+            self.pool(group)
+
+    def retire(self, group):
+        self.groups.remove(group)
+        group.active = False
+        if group.released:
+            self.pool(group)
+
+    def pool(self, group):
+        group.released = False
+        group.system = None
+        group.controllers = []
+        group.renderer = None
+        self.pools.setdefault(group.effect, []).append(group)
+
+    def wake(self, group):
+        """Resume updating a retired group."""
+        if not group.active:
+            self.add_group(group)
+
+    def __iter__(self):
+        return iter(list(self.groups))
+
+    def __len__(self):
+        return len(self.groups)
+
+    def set_viewport(self, viewport):
+        """Set the visible area; particles far outside it will be culled."""
+        if self.viewport is None:
+            self.viewport = viewport.extend(self.CULL_MARGIN)
+        else:
+            self.viewport.assign(viewport)
+            self.viewport.extend_ip(self.CULL_MARGIN)
+
+    def update(self, dt):
+        self.budget.live = sum(g.count for g in self.groups)
+        for g in list(self.groups):
+            g.update(dt)
+            if self.viewport is not None:
+                g.cull(self.viewport)
+            if g.count or g.emitting():
+                g.idle = 0
+            else:
+                g.idle += dt
+                if g.idle >= self.retire_after:
+                    self.retire(g)
+
+    def draw(self):
+        for g in self.groups:
+            g.draw()
+
+    def stats(self):
+        """Counts of live groups and particles, and of pooled groups."""
+        return {
+            'groups': len(self.groups),
+            'particles': sum(g.count for g in self.groups),
+            'pooled': sum(len(p) for p in self.pools.values()),
+            'detail': self.budget.detail(),
+        }
+
+
+class ParticleGroup(object):
+    """A set of particles sharing controllers and a renderer.
+
+    The first len(group) rows of each array are live particles; the rest is
+    spare capacity. life scales each particle's maximum age, and is lowered
+    when the particle budget is short.
+
+    """
+    ARRAYS = 'position', 'velocity', 'age', 'life', 'size', 'color'
+
+    def __init__(self, controllers=(), renderer=None, system=None, capacity=64, effect=None):
+        self.controllers = list(controllers)
+        self.renderer = renderer
+        self.effect = effect
+        self.system = None
+        self.active = False
+        self.released = False
+        self.idle = 0
+        self.count = 0
+        self.position = numpy.zeros((capacity, 2))
+        self.velocity = numpy.zeros((capacity, 2))
+        self.age = numpy.zeros(capacity)
+        self.life = numpy.ones(capacity)
+        self.size = numpy.zeros(capacity)
+        self.color = numpy.zeros((capacity, 4))
+        if system is not None:
+            system.add_group(self)
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def capacity(self):
+        return len(self.age)
+
+    def bind_controller(self, *controllers):
+        self.controllers.extend(controllers)
+        if self.system is not None:
+            self.system.wake(self)
+
+    def unbind_controller(self, controller):
+        self.controllers.remove(controller)
+
+    def _grow(self, capacity):
+        for attr in self.ARRAYS:
+            a = getattr(self, attr)
+            b = numpy.zeros((capacity,) + a.shape[1:])
+            b[:self.count] = a[:self.count]
+            setattr(self, attr, b)
+
+    def new(self, n):
+        """Allocate n particles, returning the slice they occupy.
+
+        The caller should initialise every array over the slice.
+
+        """
+        if self.count + n > self.capacity:
+            capacity = self.capacity
+            while capacity < self.count + n:
+                capacity *= 2
+            self._grow(capacity)
+        s = slice(self.count, self.count + n)
+        self.count += n
+        return s
+
+    def kill(self, dead):
+        """Remove the particles where the boolean array dead is True."""
+        if not dead.any():
+            return
+        alive = ~dead
+        n = int(alive.sum())
+        for attr in self.ARRAYS:
+            a = getattr(self, attr)
+            a[:n] = a[:self.count][alive]
+        self.count = n
+
+    def cull(self, rect):
+        """Kill particles outside rect."""
+        n = self.count
+        if not n:
+            return
+        x = self.position[:n, 0]
+        y = self.position[:n, 1]
+        self.kill((x < rect.left) | (x >= rect.right) | (y < rect.bottom) | (y >= rect.top))
+
+    def clear(self):
+        self.count = 0
+
+    def emitting(self):
+        return any(isinstance(c, StaticEmitter) for c in self.controllers)
+
+    def update(self, dt):
+        self.age[:self.count] += dt
+        for c in list(self.controllers):
+            c(dt, self)
+
+    def draw(self):
+        if self.renderer:
+            self.renderer.draw(self)
+
+
+# Domains, from which emitters pick particle positions and velocities
+
+class Disc(object):
+    """A disc of radius outer_radius centred at center."""
+    def __init__(self, center, outer_radius, inner_radius=0.0):
+        self.center = center
+        self.outer_radius = outer_radius
+        self.inner_radius = inner_radius
+
+    def generate(self, n):
+        r0 = self.inner_radius ** 2
+        r = numpy.sqrt(r0 + numpy.random.random(n) * (self.outer_radius ** 2 - r0))
+        theta = numpy.random.random(n) * (2 * math.pi)
+        out = numpy.empty((n, 2))
+        out[:, 0] = self.center[0] + r * numpy.cos(theta)
+        out[:, 1] = self.center[1] + r * numpy.sin(theta)
+        return out
+
+
+class Cone(object):
+    """A solid cone from apex to base, whose base has radius outer_radius.
+
+    Points are picked uniformly through the volume of the cone and projected
+    onto the plane.
+
+    """
+    def __init__(self, apex, base, outer_radius):
+        self.apex = apex
+        self.base = base
+        self.outer_radius = outer_radius
+
+    def generate(self, n):
+        ax, ay = self.apex[:2]
+        dx = self.base[0] - ax
+        dy = self.base[1] - ay
+        length = math.hypot(dx, dy)
+        if length:
+            px, py = -dy / length, dx / length
+        else:
+            px, py = 0.0, 0.0
+        # Distance along the axis, weighted by the area of the cross section
+        t = numpy.random.random(n) ** (1 / 3.0)
+        # Offset across the axis of a random point in that cross section
+        r = self.outer_radius * t * numpy.sqrt(numpy.random.random(n))
+        off = r * numpy.cos(numpy.random.random(n) * (2 * math.pi))
+        out = numpy.empty((n, 2))
+        out[:, 0] = ax + t * dx + off * px
+        out[:, 1] = ay + t * dy + off * py
+        return out
+
+
+# Controllers, which are called with (dt, group) each update
+
+class Movement(object):
+    """Move particles by their velocity."""
+    def __call__(self, dt, group):
+        n = group.count
+        group.position[:n] += group.velocity[:n] * dt
+
+
+class Gravity(object):
+    """Accelerate particles by a constant vector."""
+    def __init__(self, gravity):
+        self.gravity = numpy.array(gravity[:2], dtype=float)
+
+    def __call__(self, dt, group):
+        group.velocity[:group.count] += self.gravity * dt
+
+
+class Lifetime(object):
+    """Kill particles older than max_age, scaled by their life."""
+    def __init__(self, max_age):
+        self.max_age = max_age
+
+    def __call__(self, dt, group):
+        n = group.count
+        group.kill(group.age[:n] > self.max_age * group.life[:n])
+
+
+class Growth(object):
+    """Grow particles at a constant rate."""
+    def __init__(self, rate):
+        self.rate = rate
+
+    def __call__(self, dt, group):
+        group.size[:group.count] += self.rate * dt
+
+
+class ColorBlender(object):
+    """Set particle colour by age, interpolating a list of (age, colour)."""
+    def __init__(self, color_times):
+        color_times = sorted(color_times)
+        self.times = numpy.array([t for t, c in color_times], dtype=float)
+        self.colors = numpy.array([c for t, c in color_times], dtype=float)
+
+    def __call__(self, dt, group):
+        n = group.count
+        age = group.age[:n]
+        for i in xrange(4):
+            group.color[:n, i] = numpy.interp(age, self.times, self.colors[:, i])
+
+
+class Bounce(object):
+    """Bounce particles off a horizontal plane at height y.
+
+    bounce scales the particle's velocity away from the plane and friction
+    reduces its velocity along it.
+
+    """
+    def __init__(self, y, bounce=1.0, friction=0.0):
+        self.y = y
+        self.bounce = bounce
+        self.friction = friction
+
+    def __call__(self, dt, group):
+        n = group.count
+        pos = group.position[:n]
+        vel = group.velocity[:n]
+        hit = (pos[:, 1] < self.y) & (vel[:, 1] < 0)
+        if not hit.any():
+            return
+        pos[hit, 1] = self.y + (self.y - pos[hit, 1]) * self.bounce
+        vel[hit, 1] *= -self.bounce
+        vel[hit, 0] *= 1.0 - self.friction
+
+
+class StaticEmitter(object):
+    """Emit particles at a constant rate.
+
+    position and velocity are domains from which each new particle's position
+    and velocity are picked. size, if given, is a list of sizes to pick from;
+    otherwise particles start at the template size. After time_to_live
+    seconds, the emitter unbinds itself from the group.
+
+    Particles are reserved from the budget of the group's system, if any, and
+    the rate and lifetime of particles are scaled by its level of detail.
+
+    """
+    def __init__(self, rate, position, velocity, template, size=None, time_to_live=None):
+        self.rate = rate
+        self.position = position
+        self.velocity = velocity
+        self.template = template
+        self.size = size
+        self.time_to_live = time_to_live
+        self.carry = 0.0
+
+    def __call__(self, dt, group):
+        if self.time_to_live is not None:
+            self.time_to_live -= dt
+            if self.time_to_live <= 0:
+                group.unbind_controller(self)
+                return
+        budget = group.system.budget if group.system is not None else None
+        detail = budget.detail() if budget else 1.0
+        self.carry += self.rate * detail * dt
+        n = int(self.carry)
+        if n:
+            self.carry -= n
+            if budget:
+                n = budget.reserve(n)
+            if n:
+                self.emit(n, group, detail)
+
+    def emit(self, n, group, life=1.0):
+        s = group.new(n)
+        group.position[s] = self.position.generate(n)
+        group.velocity[s] = self.velocity.generate(n)
+        group.age[s] = 0
+        group.life[s] = life
+        if self.size:
+            sizes = numpy.array(self.size, dtype=float)
+            group.size[s] = sizes[numpy.random.randint(len(sizes), size=n)]
+        else:
+            group.size[s] = self.template.size
+        group.color[s] = self.template.color
+
+
+class Particle(object):
+    """The initial size and colour of particles from an emitter."""
+    def __init__(self, size=64.0, color=(1.0, 1.0, 1.0, 1.0)):
+        self.size = size
+        self.color = color
+
+
+# Rendering
+
+class QuadBuffer(object):
+    """A growable vertex list of textured quads that is reused every frame.
+
+    If batch is given, the vertex list is kept in it, in group, and is drawn
+    when the batch is.
+
+    """
+    def __init__(self, tex_coords, capacity=16, batch=None, group=None):
+        self.tex_coords = list(tex_coords)
+        self.batch = batch
+        self.group = group
+        self.capacity = 0
+        self.used = 0
+        self.vertex_list = None
+        self.grow(capacity)
+
+    def grow(self, capacity):
+        if self.vertex_list is None:
+            data = ('v2f/stream', 'c4B/stream', 't3f/static')
+            if self.batch is None:
+                self.vertex_list = vertex_list(capacity * 4, *data)
+            else:
+                self.vertex_list = self.batch.add(capacity * 4, gl.GL_QUADS, self.group, *data)
+        else:
+            self.vertex_list.resize(capacity * 4)
+        self.vertex_list.tex_coords[:] = self.tex_coords * capacity
+        self.capacity = capacity
+
+    def set_quads(self, n, vertices, colours):
+        """Write n quads from arrays of shape (n, 8) and (n, 16).
+
+        Any quads left from a previous frame are collapsed.
+
+        """
+        if n > self.capacity:
+            capacity = self.capacity
+            while capacity < n:
+                capacity *= 2
+            self.grow(capacity)
+        vl = self.vertex_list
+        vs = numpy.ctypeslib.as_array(vl.vertices)
+        vs[:n * 8] = vertices.ravel()
+        if self.used > n:
+            vs[n * 8:self.used * 8] = 0
+        numpy.ctypeslib.as_array(vl.colors)[:n * 16] = colours.ravel()
+        self.used = n
+
+    def draw(self):
+        self.vertex_list.draw(gl.GL_QUADS)
+
+    def delete(self):
+        self.vertex_list.delete()
+
+
+class Renderer(object):
+    """Draw particles as rotating, scaled, coloured copies of image.
+
+    A particle's size is its width in pixels if image were 64 pixels wide, and
+    it spins two turns per second of its age. Each group's particles are
+    written as quads into a vertex list kept for that group. If the group's
+    system has Layers, the vertex list is kept in their batch, and drawing a
+    group only brings it up to date; the batch draws it.
+
+    """
+    def __init__(self, image):
+        self.image = image
+        self.texture = None
+        self.buffers = {}  # id(group): (weakref to group, QuadBuffer)
+
+    def buffer_for(self, group):
+        key = id(group)
+        try:
+            return self.buffers[key][1]
+        except KeyError:
+            pass
+
+        def release(ref):
+            ref, buf = self.buffers.pop(key)
+            buf.delete()
+
+        layers = group.system.layers if group.system is not None else None
+        if layers is None:
+            buf = QuadBuffer(self.texture.tex_coords)
+        else:
+            buf = QuadBuffer(
+                self.texture.tex_coords,
+                batch=layers.batch,
+                group=TextureGroup(self.texture, layers.particles)
+            )
+        self.buffers[key] = (weakref.ref(group, release), buf)
+        return buf
+
+    def quads(self, group):
+        """Compute the vertices and colours of the quads for group."""
+        img = self.image
+        ax, ay = img.anchor_x, img.anchor_y
+        n = group.count
+        scale = group.size[:n] / 64.0
+        # Corners relative to the anchor, unscaled, anticlockwise
+        cx = numpy.array([-ax, img.width - ax, img.width - ax, -ax], dtype=float)
+        cy = numpy.array([-ay, -ay, img.height - ay, img.height - ay], dtype=float)
+        r = numpy.radians(group.age[:n] * -720)
+        cr = (numpy.cos(r) * scale)[:, numpy.newaxis]
+        sr = (numpy.sin(r) * scale)[:, numpy.newaxis]
+        pos = group.position[:n]
+        verts = numpy.empty((n, 4, 2), dtype=numpy.float32)
+        verts[:, :, 0] = cx * cr - cy * sr + pos[:, 0:1]
+        verts[:, :, 1] = cx * sr + cy * cr + pos[:, 1:2]
+        colours = numpy.clip(group.color[:n] * 255, 0, 255).astype(numpy.uint8)
+        return verts.reshape(n, 8), numpy.tile(colours, 4)
+
+    def draw(self, group):
+        if self.texture is None:
+            self.texture = self.image.get_texture()
+        buf = self.buffer_for(group)
+        n = group.count
+        verts, colours = self.quads(group)
+        buf.set_quads(n, verts, colours)
+        if not n or buf.batch is not None:
+            return
+
+        tex = self.texture
+        gl.glEnable(gl.GL_BLEND)
+        gl.glBlendFunc(gl.GL_SRC_ALPHA, gl.GL_ONE_MINUS_SRC_ALPHA)
+        gl.glEnable(tex.target)
+        gl.glBindTexture(tex.target, tex.id)
+        buf.draw()
+        gl.glDisable(tex.target)
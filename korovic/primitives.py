@@ -7,6 +7,7 @@ from .constants import SELECTED_COLOUR
 from .camera import Rect
 from . import loader
 from .vector import v
+from .headless import vertex_list
 
 
 def walk(list):
@@ -44,12 +45,14 @@ class Rectangle(object):
             colours = [a, a, b, b]
         cl = len(colours[0])
         self.colours = list(walk(colours))
-        self.vertex_list = pyglet.graphics.vertex_list(4,
+        self.vertex_list = vertex_list(4,
             ('v2f', self.vertices),
             ('c%df' % cl, self.colours)
         )
         
     def draw(self):
+        gl.glEnable(gl.GL_BLEND)
+        gl.glBlendFunc(gl.GL_SRC_ALPHA, gl.GL_ONE_MINUS_SRC_ALPHA)
         self.vertex_list.draw(gl.GL_QUADS)
 
 
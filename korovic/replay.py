@@ -0,0 +1,166 @@
+"""Record the player's control inputs during a flight and play them back.
+
+A replay holds the level, Susie's loadout and a list of (tick, controller,
+pressed) events, where tick is the World.ticks count at which the key was
+pressed or released and controller indexes World.controllers(). Playing a
+replay feeds the events into a HeadlessWorld as fast as it will go, so real
+flights can be reproduced and profiled offline, eg. ::
+
+    $ KOROVIC_HEADLESS=1 python -m korovic.replay flight.replay
+
+"""
+import os
+import sys
+import time
+import struct
+from collections import deque
+
+from . import components
+
+
+MAGIC = 'KRPL'
+VERSION = 1
+
+HEADER = struct.Struct('<4sBH')
+BYTE = struct.Struct('<B')
+COMPONENT = struct.Struct('<Bd')
+COUNT = struct.Struct('<I')
+EVENT = struct.Struct('<IB')
+
+
+class ReplayError(Exception):
+    """The replay file was invalid."""
+
+
+class Replay(object):
+    def __init__(self, level, loadout, events=None):
+        self.level = level
+        self.loadout = loadout
+        self.events = events or []
+
+    def save(self, f):
+        """Write the replay to the file object f."""
+        out = [HEADER.pack(MAGIC, VERSION, len(self.level)), self.level]
+        out.append(BYTE.pack(len(self.loadout)))
+        for component_class, slot, angle in self.loadout:
+            name = component_class.__name__
+            out.extend([BYTE.pack(len(name)), name, COMPONENT.pack(slot, angle)])
+        out.append(COUNT.pack(len(self.events)))
+        for tick, controller, pressed in self.events:
+            out.append(EVENT.pack(tick, controller << 1 | bool(pressed)))
+        f.write(''.join(out))
+
+    @classmethod
+    def load(cls, f):
+        """Read a replay from the file object f."""
+        data = f.read()
+        offset = [0]
+
+        def read(s):
+            vs = s.unpack_from(data, offset[0])
+            offset[0] += s.size
+            return vs
+
+        def read_str(length):
+            s = data[offset[0]:offset[0] + length]
+            offset[0] += length
+            return s
+
+        try:
+            magic, version, length = read(HEADER)
+            if magic != MAGIC or version != VERSION:
+                raise ReplayError("Not a version %d replay" % VERSION)
+            level = read_str(length)
+
+            loadout = []
+            count, = read(BYTE)
+            for i in xrange(count):
+                length, = read(BYTE)
+                name = read_str(length)
+                slot, angle = read(COMPONENT)
+                try:
+                    loadout.append((getattr(components, name), slot, angle))
+                except AttributeError:
+                    raise ReplayError("Unknown component %s" % name)
+
+            events = []
+            count, = read(COUNT)
+            for i in xrange(count):
+                tick, c = read(EVENT)
+                events.append((tick, c >> 1, bool(c & 1)))
+        except struct.error:
+            raise ReplayError("Replay is truncated")
+        return cls(level, loadout, events)
+
+
+class Recorder(object):
+    """Record the controls used during a flight in a World."""
+    def __init__(self):
+        self.replay = None
+        self.world = None
+
+    def start(self, world):
+        self.world = world
+        self.replay = Replay(world.level_name, world.squid.loadout())
+
+    def record(self, controller, pressed):
+        if self.replay:
+            self.replay.events.append((self.world.ticks, controller, pressed))
+
+    def stop(self):
+        """Stop recording and return the Replay, if a flight was recorded."""
+        replay = self.replay
+        self.replay = None
+        return replay
+
+
+class FileRecorder(Recorder):
+    """Save each recorded flight as a new file in a directory."""
+    def __init__(self, directory):
+        super(FileRecorder, self).__init__()
+        self.directory = directory
+
+    def stop(self):
+        replay = super(FileRecorder, self).stop()
+        if replay and replay.events:
+            name = '%s-%s.replay' % (replay.level, time.strftime('%Y%m%d-%H%M%S'))
+            with open(os.path.join(self.directory, name), 'wb') as f:
+                replay.save(f)
+        return replay
+
+
+def play(replay, max_time=600):
+    """Fly replay in a HeadlessWorld, returning a FlightResult."""
+    from .world import HeadlessWorld
+    world = HeadlessWorld(replay.level)
+    world.squid.fit(replay.loadout)
+    world.reset()
+    controllers = world.controllers()
+    events = deque(sorted(replay.events, key=lambda e: e[0]))
+
+    def feed(world):
+        while events and events[0][0] <= world.ticks:
+            tick, controller, pressed = events.popleft()
+            c = controllers[controller]
+            if pressed:
+                c.on_press()
+            else:
+                c.on_release()
+
+    return world.run_until_done(max_time, before_tick=feed)
+
+
+def main():
+    """Play back replay files given on the command line, timing each."""
+    for path in sys.argv[1:]:
+        with open(path, 'rb') as f:
+            replay = Replay.load(f)
+        start = time.time()
+        result = play(replay)
+        print '%s: %s %.1fm in %.1fs (simulated in %.3fs)' % (
+            path, result.outcome, result.distance, result.time, time.time() - start
+        )
+
+
+if __name__ == '__main__':
+    main()
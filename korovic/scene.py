@@ -6,9 +6,8 @@ from pyglet.event import EVENT_HANDLED
 
 from .vector import v
 
-from .background import GradientPainter, sky
+from .background import Backdrop, sky
 from .background import Clouds, Stars
-from .background import HorizonPainter, ForegroundSeaPainter
 
 from .camera import Camera
 from . import loader
@@ -22,18 +21,20 @@ from .primitives import SpeechBubble, Button, Label
 
 
 class Scene(object):
-    def __init__(self, game, level=1):
+    def __init__(self, game, level=1, recorder=None):
         self.game = game
+        self.recorder = recorder
         Clouds.load()
         Stars.load()
         self.level = level
         self.world = World('level%d' % self.level)
         self.camera = Camera()
-        self.background = GradientPainter(sky)
+        self.background = Backdrop(sky, [
+            (HORIZON_LEVEL, (0.5, 0.8, 1), 0),
+            (SEA_LEVEL, (0.5, 0.8, 1), Backdrop.FOREGROUND),
+        ])
         self.clouds = Clouds()
         self.stars = Stars()
-        self.horizon = HorizonPainter(HORIZON_LEVEL, (0.5, 0.8, 1))
-        self.fgsea = ForegroundSeaPainter(SEA_LEVEL, (0.5, 0.8, 1))
         self.hud = GameHud(self.world)
 
         self.world.set_handler('on_crash', self.on_crash)
@@ -69,6 +70,12 @@ class Scene(object):
             return cs[(num - 1) % 10]
         except IndexError:
             return NullController()
+
+    def record(self, num, pressed):
+        """Record a control input, if we're recording replays."""
+        i = (num - 1) % 10
+        if self.recorder and i < len(self.controllers):
+            self.recorder.record(i, pressed)
     
     def update(self, dt):
         self.world.update(dt)
@@ -77,10 +84,8 @@ class Scene(object):
         self.camera.track(self.world.squid, max_x=self.world.width)
         vp = self.camera.viewport()
         self.background.draw(vp)
-        self.horizon.draw(vp)
         self.clouds.set_viewport(vp)
         self.stars.set_viewport(vp)
-        self.fgsea.draw(vp)
 
         with self.camera.modelview():
             self.stars.draw()
@@ -99,6 +104,7 @@ class Scene(object):
         if key._0 <= symbol <= key._9:
             controller = symbol - key._0
             self.get_controller(controller).on_press()
+            self.record(controller, True)
             return EVENT_HANDLED
 
 
@@ -109,15 +115,20 @@ class Scene(object):
         if key._0 <= symbol <= key._9:
             controller = symbol - key._0
             self.get_controller(controller).on_release()
+            self.record(controller, False)
             return EVENT_HANDLED
 
     def start(self):
         self.world.reset()
         self.world.squid.stop_all()
         self.update_controllers()
+        if self.recorder:
+            self.recorder.start(self.world)
 
     def stop(self):
         self.world.clear_particles()
+        if self.recorder:
+            self.recorder.stop()
 
 
 class Editor(object):
@@ -262,7 +273,7 @@ class TitleScreen(object):
         self.game = game
         Clouds.load()
         self.camera = Camera()
-        self.background = GradientPainter(sky)
+        self.background = Backdrop(sky)
         self.clouds = Clouds()
         self.logo = loader.image('data/sprites/logo.png')
         self.logo.anchor_x = int(self.logo.width * 0.5)
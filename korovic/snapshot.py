@@ -0,0 +1,115 @@
+"""Record the state of pymunk bodies and restore it in place.
+
+Restoring a snapshot writes the recorded state back into the same Body
+objects, so retrying a flight needn't allocate new bodies and shapes. Joints
+can't be reset in place, so tethers get new ones.
+
+"""
+import pymunk
+
+
+class BodySnapshot(object):
+    """The dynamic state of a list of pymunk bodies."""
+    def __init__(self, bodies):
+        self.bodies = list(bodies)
+        self.states = [self.get_state(b) for b in self.bodies]
+
+    @staticmethod
+    def get_state(b):
+        # Copy the vectors; pymunk's share memory with the body
+        return (
+            tuple(b.position),
+            tuple(b.velocity),
+            b.angle,
+            b.angular_velocity,
+            tuple(b.force),
+            b.torque,
+            b.mass,
+        )
+
+    def restore(self):
+        for b, (pos, vel, angle, avel, force, torque, mass) in zip(self.bodies, self.states):
+            b.position = pos
+            b.velocity = vel
+            b.angle = angle
+            b.angular_velocity = avel
+            b.force = force
+            b.torque = torque
+            b.mass = mass
+
+
+class TetherSnapshot(object):
+    """The state of a list of tethers that their bodies don't hold.
+
+    Restoring it replaces the joints of pymunk tethers, so it must be done
+    while they are out of the space.
+
+    """
+    def __init__(self, tethers):
+        self.tethers = list(tethers)
+        self.states = [t.get_state() for t in self.tethers]
+
+    def restore(self):
+        for t, state in zip(self.tethers, self.states):
+            t.restore(state)
+
+
+def squid_bodies(squid):
+    return [b for b in squid.bodies_and_shapes() if isinstance(b, pymunk.Body)]
+
+
+def actor_bodies(actors):
+    return [
+        b for a in actors for b in a.bodies_and_shapes()
+        if isinstance(b, pymunk.Body)
+    ]
+
+
+def tethers(objects):
+    """The tethers of those objects that have one."""
+    ts = (getattr(o, 'tether', None) for o in objects)
+    return [t for t in ts if t is not None]
+
+
+class SquidSnapshot(BodySnapshot):
+    """The launch state of Susie and all her components."""
+    def __init__(self, squid):
+        super(SquidSnapshot, self).__init__(squid_bodies(squid))
+        self.tethers = TetherSnapshot(tethers(squid.slots.components))
+        self.squid = squid
+        self.loadout = squid.loadout()
+        self.fuel = squid.fuel
+
+    def matches(self, squid):
+        """Return True if this snapshot can be restored into squid as it is now.
+
+        It can't if components have been changed or moved, or if anything has
+        recreated the bodies since the snapshot was taken.
+
+        """
+        if squid is not self.squid or squid.loadout() != self.loadout:
+            return False
+        bodies = squid_bodies(squid)
+        return (
+            len(bodies) == len(self.bodies) and
+            all(a is b for a, b in zip(bodies, self.bodies))
+        )
+
+    def restore(self):
+        super(SquidSnapshot, self).restore()
+        self.tethers.restore()
+        self.squid.fuel = self.fuel
+        for c in self.squid.slots.components:
+            c.reset_state()
+        self.squid.components_changed()
+
+
+class ActorSnapshot(BodySnapshot):
+    """The starting state of a level's actors, and their tethers."""
+    def __init__(self, actors):
+        super(ActorSnapshot, self).__init__(actor_bodies(actors))
+        self.tethers = TetherSnapshot(tethers(actors))
+
+    def restore(self):
+        super(ActorSnapshot, self).restore()
+        self.tethers.restore()
@@ -1,9 +1,26 @@
 from pkg_resources import resource_stream
-import pygame.mixer
 
-pygame.mixer.init()
+from .headless import HEADLESS
+
+if not HEADLESS:
+    import pygame.mixer
+    pygame.mixer.init()
+
+
+class NullSound(object):
+    """A silent sound, used when there is no audio device."""
+    def play(self, *args, **kwargs):
+        return self
+
+    def fadeout(self, ms):
+        pass
+
+    def stop(self):
+        pass
 
 
 def load_sound(name):
+    if HEADLESS:
+        return NullSound()
     f = resource_stream(__name__, name)
     return pygame.mixer.Sound(f)
@@ -0,0 +1,75 @@
+"""A uniform grid index over the bounding boxes of objects in a level.
+
+Levels are long, and the camera only ever sees a small part of one, so rather
+than visit every sprite and actor each frame the World asks the index which
+are near the viewport or near Susie.
+
+"""
+from collections import defaultdict
+
+
+class GridIndex(object):
+    """Index objects by the grid cells their bounding boxes overlap."""
+    def __init__(self, cell_size=1024):
+        self.cell_size = cell_size
+        self.cells = defaultdict(list)
+        self.bounds = {}
+
+    def __len__(self):
+        return len(self.bounds)
+
+    def __iter__(self):
+        return iter(self.bounds)
+
+    def _cells(self, l, b, r, t):
+        cs = self.cell_size
+        for ix in xrange(int(l // cs), int(r // cs) + 1):
+            for iy in xrange(int(b // cs), int(t // cs) + 1):
+                yield ix, iy
+
+    def insert(self, obj, rect):
+        """Add obj to the index, with the bounding box rect."""
+        box = (rect.left, rect.bottom, rect.right, rect.top)
+        self.bounds[obj] = box
+        for c in self._cells(*box):
+            self.cells[c].append(obj)
+
+    def move(self, obj, rect):
+        """Give obj, which is already in the index, a new bounding box."""
+        box = (rect.left, rect.bottom, rect.right, rect.top)
+        if self._span(*box) == self._span(*self.bounds[obj]):
+            self.bounds[obj] = box
+        else:
+            self.remove(obj)
+            self.insert(obj, rect)
+
+    def _span(self, l, b, r, t):
+        cs = self.cell_size
+        return int(l // cs), int(b // cs), int(r // cs), int(t // cs)
+
+    def remove(self, obj):
+        box = self.bounds.pop(obj)
+        for c in self._cells(*box):
+            objs = self.cells[c]
+            objs.remove(obj)
+            if not objs:
+                del self.cells[c]
+
+    def clear(self):
+        self.cells.clear()
+        self.bounds.clear()
+
+    def query(self, rect):
+        """Find the set of objects whose bounding boxes intersect rect."""
+        l, b, r, t = rect.left, rect.bottom, rect.right, rect.top
+        found = set()
+        cells = self.cells
+        bounds = self.bounds
+        for c in self._cells(l, b, r, t):
+            for obj in cells.get(c, ()):
+                if obj in found:
+                    continue
+                ol, ob, or_, ot = bounds[obj]
+                if ol < r and l < or_ and ob < t and b < ot:
+                    found.add(obj)
+        return found
@@ -0,0 +1,42 @@
+"""Policies for how many physics substeps to take per world tick.
+
+A policy is any object with a substeps(world, dt) method returning the number
+of equal substeps in which to step the space over a tick of length dt.
+
+"""
+import math
+
+from .vector import v
+
+
+class FixedSubsteps(object):
+    """Always take the same number of substeps."""
+    def __init__(self, n=5):
+        self.n = n
+
+    def substeps(self, world, dt):
+        return self.n
+
+
+class AdaptiveSubsteps(object):
+    """Take more substeps when Susie is moving fast near static geometry.
+
+    Each substep may carry Susie at most clearance_fraction of the distance to
+    the nearest geometry (the sea counts), but never less than min_travel.
+    This keeps cruising flight cheap while fast flight near islands still gets
+    sensitive collisions.
+
+    """
+    def __init__(self, min_substeps=2, max_substeps=10, min_travel=10.0, clearance_fraction=0.5):
+        self.min_substeps = min_substeps
+        self.max_substeps = max_substeps
+        self.min_travel = min_travel
+        self.clearance_fraction = clearance_fraction
+
+    def substeps(self, world, dt):
+        squid = world.squid
+        travel = v(squid.body.velocity).length * dt
+        clearance = world.clearance(squid.position)
+        max_travel = max(self.min_travel, clearance * self.clearance_fraction)
+        n = int(math.ceil(travel / max_travel))
+        return max(self.min_substeps, min(self.max_substeps, n))
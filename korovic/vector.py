@@ -32,7 +32,6 @@
 from __future__ import division
 
 import math
-import weakref
 
 
 def cached(func):
@@ -68,7 +67,11 @@ def cached(func):
 class Vector(tuple):
     """Two-dimensional float vector implementation.
 
+    Vectors have no instance dictionary, so derived values such as the length
+    are computed on each access rather than cached.
+
     """
+    __slots__ = ()
 
     def __str__(self):
         """Construct a concise string representation.
@@ -96,22 +99,22 @@ class Vector(tuple):
         """
         return self[1]
 
-    @cached
+    @property
     def length(self):
         """The length of the vector.
 
         """
-        return math.sqrt(self.length2)
+        return math.hypot(self[0], self[1])
 
-    @cached
+    @property
     def length2(self):
         """The square of the length of the vector.
 
         """
         vx, vy = self
-        return vx ** 2 + vy ** 2
+        return vx * vx + vy * vy
 
-    @cached
+    @property
     def angle(self):
         """The angle the vector makes to the positive x axis in the range
         (-180, 180].
@@ -240,12 +243,35 @@ class Vector(tuple):
             `angle` : float
                 The angle (in degrees) by which to rotate.
 
+        """
+        return self.rotated_rad(math.radians(angle))
+
+    def rotated_rad(self, angle):
+        """Compute the vector rotated by an angle in radians.
+
+        :Parameters:
+            `angle` : float
+                The angle (in radians) by which to rotate.
+
         """
         vx, vy = self
-        angle = math.radians(angle)
         ca, sa = math.cos(angle), math.sin(angle)
         return Vector((vx * ca - vy * sa, vx * sa + vy * ca))
 
+    def rotated_cs(self, ca, sa):
+        """Compute the vector rotated by the angle with the given cosine and
+        sine, to rotate many vectors by the same angle.
+
+        :Parameters:
+            `ca` : float
+                The cosine of the angle by which to rotate.
+            `sa` : float
+                The sine of the angle by which to rotate.
+
+        """
+        vx, vy = self
+        return Vector((vx * ca - vy * sa, vx * sa + vy * ca))
+
     def scaled_to(self, length):
         """Compute the vector scaled to a given length.
 
@@ -256,9 +282,7 @@ class Vector(tuple):
         """
         vx, vy = self
         s = length / self.length
-        v = Vector((vx * s, vy * s))
-        v.length = length
-        return v
+        return Vector((vx * s, vy * s))
 
     def safe_scaled_to(self, length):
         """Compute the vector scaled to a given length, or just return the
@@ -279,9 +303,7 @@ class Vector(tuple):
         """
         vx, vy = self
         l = self.length
-        v = Vector((vx / l, vy / l))
-        v.length = 1.0
-        return v
+        return Vector((vx / l, vy / l))
 
     def safe_normalised(self):
         """Compute the vector scaled to unit length, or just return the vector
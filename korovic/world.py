@@ -1,86 +1,133 @@
-import re
-from xml.etree.ElementTree import parse
-from pkg_resources import resource_stream
+import math
+from collections import namedtuple
 
 import pymunk
-from pyglet import gl
 from pyglet.event import EventDispatcher
-from pyglet.graphics import Batch
-from pyglet.sprite import Sprite
-from lepton import ParticleSystem, ParticleGroup, Particle
-from lepton import domain
-from lepton.emitter import StaticEmitter
-from lepton import controller
-
-from .components.engines import Renderer
-
 from .vector import v
 from .camera import Rect
 from . import components
 from . import loader
+from . import levels
+from . import particles
+from .layers import Layers
+from .spatial import GridIndex
 from .constants import TARGET_FPS, SEA_LEVEL
+from .constants import COLLISION_SQUID, COLLISION_SEA, COLLISION_GOAL
 from .sound import load_sound
+from .headless import Sprite
+from .substeps import AdaptiveSubsteps
+from .snapshot import ActorSnapshot
+
+
+FlightResult = namedtuple('FlightResult', 'outcome distance time')
 
 
 class World(EventDispatcher):
-    def __init__(self, initial_level):
+    # The physics runs in fixed ticks of this length, whatever the frame rate
+    TIMESTEP = 1 / TARGET_FPS
+
+    # The most ticks to run in one update to catch up after a frame hitch;
+    # beyond this the simulation slows down rather than stalling the game
+    MAX_CATCH_UP = 5
+
+    # The most particles to have alive at once, however many rockets fire
+    MAX_PARTICLES = 1500
+
+    # Sprites and actors are drawn if they are within this of the viewport
+    DRAW_MARGIN = 256
+
+    # Actors further than this from Susie sleep: they are taken out of the
+    # space and not updated
+    WAKE_DISTANCE = 3000
+
+    # How far a barrage balloon and its tether may sway from its mooring
+    BALLOON_SWAY = 300
+
+    # The size of the sensor below sea level, which follows Susie along
+    SEA_WIDTH = 4000
+    SEA_DEPTH = 2000
+
+    def __init__(self, initial_level, substeps=None):
         super(World, self).__init__()
         self.space = pymunk.Space()
         self.space.gravity = (0.0, -900.0)
         self.space.damping = 0.9
         self.space.iterations = 20
+        self.substeps = substeps or AdaptiveSubsteps()
+        self.accumulator = 0
+        self.ticks = 0
+        self.obstacles = []
+        self.launch_snapshot = None
+        self.actor_snapshot = None
+
+        self.goals = {}
+        self.touched_sea = False
+        self.touched_goal = None
+        self.space.add_collision_handler(COLLISION_SQUID, COLLISION_SEA, begin=self.on_touch_sea)
+        self.space.add_collision_handler(COLLISION_SQUID, COLLISION_GOAL, begin=self.on_touch_goal)
+        self.create_sea()
 
         self.splash = load_sound('data/sounds/splash.wav')
 
         self.images = {}
         self.sprites = []
         self.actors = []
-        self.batch = Batch()
+        self.actor_order = {}
+        self.sprite_index = GridIndex()
+        self.actor_index = GridIndex()
+        self.awake = set()
+        self.visible_sprites = set()
+        self.visible_actors = set()
+        self.draw_area = Rect((0, 0), (0, 0))
+        self.layers = self.create_layers()
 
         self.load_sprite('sprites/susie-destroy')
         components.load_all()
         self.squid = components.Susie(self)
+        self.squid.set_layers(self.layers)
+        self.squid_visible = True
 
         self.width = None
         self.goal = None
 
         self.load(initial_level)
-        self.particles = ParticleSystem()
+        self.particle_budget = particles.ParticleBudget(self.MAX_PARTICLES)
+        self.particles = particles.ParticleSystem(
+            budget=self.particle_budget,
+            layers=self.layers
+        )
         self.crashed = False
         self.won = False
         self.splash_group = None
+        self.splash_renderer = None
 
     def particle_splash(self, pos, vel):
-        img = self.load_sprite('sprites/drip')
-        img.anchor_x = img.width / 2
-        img.anchor_y = img.height / 2
-        e = StaticEmitter(
-            position=domain.Disc(
-                (pos.x, SEA_LEVEL, 0),
-                (0, 0, 1),
-                50
-            ),
-            velocity=domain.Disc(
-                (vel.x, vel.y, 0),
-                (0, 0, 1),
-                200
-            ),
-            size=[(64.0, 64.0, 0), (80.0, 80.0, 0), (100.0, 100.0, 0)],
-            template=Particle(
+        if self.splash_renderer is None:
+            img = self.load_sprite('sprites/drip')
+            img.anchor_x = img.width / 2
+            img.anchor_y = img.height / 2
+            self.splash_renderer = particles.Renderer(img)
+        if self.splash_group is not None:
+            self.particles.release(self.splash_group)
+        e = particles.StaticEmitter(
+            position=particles.Disc((pos.x, SEA_LEVEL), 50),
+            velocity=particles.Disc((vel.x, vel.y), 200),
+            size=[64.0, 80.0, 100.0],
+            template=particles.Particle(
                 color=(1.0, 1.0, 1.0, 1.0),
             ),
             rate=100,
             time_to_live=0.3
         )
-        self.splash_group = ParticleGroup(
+        self.splash_group = self.particles.new_group(
+            'splash',
             controllers=[
-                controller.Movement(),
-                controller.Gravity((0, -900, 0)),
-                controller.Lifetime(max_age=2),
+                particles.Movement(),
+                particles.Gravity((0, -900)),
+                particles.Lifetime(max_age=2),
                 e
             ],
-            renderer=Renderer(img),
-            system=self.particles
+            renderer=self.splash_renderer,
         )
 
     def load_sprite(self, img):
@@ -88,82 +135,126 @@ class World(EventDispatcher):
             self.images[img] = loader.image('data/%s.png' % img)
         return self.images[img]
 
+    def create_layers(self):
+        return Layers()
+
     def create_sprite(self, img, x, y):
         s = self.load_sprite(img)
-        self.sprites.append(
-            Sprite(s, x=x, y=y)
-        )
+        sprite = Sprite(s, x=x, y=y, batch=self.layers.batch, group=self.layers.background)
+        # Hidden until draw() finds it near the viewport
+        sprite.visible = False
+        self.sprites.append(sprite)
+        self.sprite_index.insert(sprite, Rect(v(x, y), v(x + s.width, y + s.height)))
 
     def destroy_actors(self):
+        self.sleep_actors()
         for a in self.actors:
-            self.space.remove(*a.bodies_and_shapes())
+            a.release()
+            a.delete()
         self.actors = []
-    
+        self.actor_order = {}
+        self.actor_index.clear()
+        self.visible_actors = set()
+
     def load(self, level):
         self.space.remove_static(*self.space.static_shapes)
+        self.obstacles = []
         self.squid.slots.detach_all()
         self.create_wall()
+        self.destroy_actors()
+        for s in self.sprites:
+            s.delete()
         self.sprites = []
+        self.sprite_index.clear()
+        self.visible_sprites = set()
         self.goal = None
+        self.goals = {}
         self.width = None
-        doc = parse(resource_stream(__name__, 'data/levels/%s.svg' % level))
-
-        self.width = w = int(doc.getroot().get('width'))
-        h = int(doc.getroot().get('height'))
-        self.title = doc.find('.//{http://www.w3.org/2000/svg}title').text
-        try:
-            self.money = int(doc.find('.//{http://purl.org/dc/elements/1.1/}identifier').text)
-        except AttributeError:
-            self.money = 3000
+        self.level = lvl = levels.load_level(level)
+        self.level_name = level
 
+        self.title = lvl.title
+        self.money = lvl.money
         self.squid.money = self.money
-        for im in doc.findall('.//{http://www.w3.org/2000/svg}image'):
-            mo = re.search(r'(?P<path>\w+/(?P<type>[\w-]+))\.png$', im.get('{http://www.w3.org/1999/xlink}href'))
-            if not mo:
-                print "Unknown object", im
-                continue
-            type = mo.group('type')
-            path = mo.group('path')
-            x = int(float(im.get('x')))
-            ih = float(im.get('height'))
-            iw = int(float(im.get('width')))
-            y = h - int(float(im.get('y')) + ih)
-
-            if type == 'island-lair':
-                self.create_island(x, x + iw)
-                self.create_sprite(path, x, y)
-            elif type == 'city':
-                self.create_island(x, x + iw)
-                self.create_sprite(path, x, y)
-                self.create_goal(x, x + iw)
-                # Only if the city straddles the edge of the page
-                # Do we create a wall there
-                if x + iw < w:
-                    self.width = None
-            elif type == 'barrageballoon':
-                x += iw * 0.5
-                y += ih * 0.7
-                balloon = components.BarrageBalloon()
-                self.actors.append(balloon)
-                b = pymunk.Body(pymunk.inf, pymunk.inf)
-                b.position = v(x, 0)
-                balloon.tether_to(b, y)
-                self.space.add(*balloon.bodies_and_shapes())
-            else:
-                print "Unknown object", path
-
-        if self.goal:
-            if self.width:
-                self.create_wall(self.width + 500)
-        else:
-            self.width = None
+
+        for x1, x2 in lvl.islands:
+            self.create_island(x1, x2)
+        for path, x, y in lvl.sprites:
+            self.create_sprite(path, x, y)
+        for x1, x2 in lvl.goals:
+            self.create_goal(x1, x2)
+        self.create_actors()
+
+        self.width = lvl.width
+        if self.width:
+            self.create_wall(self.width + 500)
+
+    def create_actors(self):
+        """Create the level's actors, and snapshot them where they start."""
+        for x, y in self.level.balloons:
+            self.create_barrage_balloon(x, y)
+        self.actor_order = dict((a, i) for i, a in enumerate(self.actors))
+        self.actor_snapshot = ActorSnapshot(self.actors)
+
+    def create_barrage_balloon(self, x, alt):
+        balloon = components.BarrageBalloon()
+        self.actors.append(balloon)
+        b = pymunk.Body(pymunk.inf, pymunk.inf)
+        b.position = v(x, 0)
+        balloon.tether_to(b, alt)
+        balloon.set_layers(self.layers)
+        balloon.set_visible(False)
+        # Apply its lift now; forces persist while the balloon sleeps
+        balloon.update(self.TIMESTEP)
+        # It starts asleep, and is added to the space when Susie comes near
+        self.actor_index.insert(balloon, self.actor_bounds(balloon))
+
+    def actor_bounds(self, a):
+        """The box around a balloon and its tether, with room to sway."""
+        s = self.BALLOON_SWAY
+        ax, ay = a.anchor
+        x, y = a.body.position
+        return Rect(
+            v(min(ax, x) - s, min(ay, y)),
+            v(max(ax, x) + s, max(ay, y) + s)
+        )
+
+    def reindex_actors(self, actors):
+        """Move actors' boxes in the index to where they are now."""
+        for a in actors:
+            self.actor_index.move(a, self.actor_bounds(a))
+
+    def nearby_actors(self):
+        """Find the actors near enough to Susie that they need simulating."""
+        x, y = self.squid.position
+        d = self.WAKE_DISTANCE
+        return self.actor_index.query(Rect(v(x - d, y - d), v(x + d, y + d)))
+
+    def wake_actors(self):
+        """Wake the actors near Susie and put those far from her to sleep.
+
+        Sleeping actors are removed from the space, so they cost nothing to
+        step, however many a level has. Nothing moves them while they sleep,
+        so when they wake they carry on exactly where they left off.
+
+        Returns the awake actors, in the order they were created.
+
+        """
+        near = self.nearby_actors()
+        order = self.actor_order.__getitem__
+        for a in sorted(self.awake - near, key=order):
+            self.space.remove(*a.bodies_and_shapes())
+        for a in sorted(near - self.awake, key=order):
+            self.space.add(*a.bodies_and_shapes())
+        self.awake = near
+        return sorted(near, key=order)
 
     def clear_particles(self):
         for group in self.particles:
             for c in list(group.controllers):
-                if isinstance(c, StaticEmitter):
+                if isinstance(c, particles.StaticEmitter):
                     group.unbind_controller(c)
-            group.update(10)  # force any particles to expire
+            group.clear()
 
     def remove_squid(self):
         try:
@@ -171,11 +262,37 @@ class World(EventDispatcher):
         except KeyError:
             pass
 
+    def sleep_actors(self):
+        """Take all the actors out of the space."""
+        for a in sorted(self.awake, key=self.actor_order.__getitem__):
+            self.space.remove(*a.bodies_and_shapes())
+        self.awake = set()
+
     def reset(self):
+        """Put Susie back on the launch pad, and the actors where they started.
+
+        The first reset with a new loadout builds Susie's bodies afresh and
+        snapshots them; later resets restore that snapshot in place. The
+        actors are always restored from the snapshot taken when the level
+        was loaded.
+
+        """
         self.remove_squid()
-        self.squid.reset()
+        self.sleep_actors()
+        self.actor_snapshot.restore()
+        self.reindex_actors(self.actors)
+        snapshot = self.launch_snapshot
+        if snapshot and snapshot.matches(self.squid):
+            snapshot.restore()
+        else:
+            self.squid.reset()
+            self.launch_snapshot = self.squid.snapshot()
         self.crashed = False
         self.won = False
+        self.touched_sea = False
+        self.touched_goal = None
+        self.accumulator = 0
+        self.ticks = 0
         self.clear_particles()
         self.space.add(self.squid.bodies_and_shapes())
 
@@ -184,6 +301,7 @@ class World(EventDispatcher):
         seg = pymunk.Segment(body, (x, 0), (x, 100000), width)
         seg.friction = 0
         self.space.add_static(seg)
+        self.obstacles.append(Rect(v(x - width, -width), v(x + width, 100000 + width)))
 
     def create_island(self, x1, x2, y=20):
         body = pymunk.Body(pymunk.inf, pymunk.inf)
@@ -195,63 +313,171 @@ class World(EventDispatcher):
         self.space.add_static(pymunk.Segment(body, p1, p2, SEA_LEVEL))
         self.space.add_static(pymunk.Segment(body, p2, p3, SEA_LEVEL))
         self.space.add_static(pymunk.Segment(body, p3, p4, SEA_LEVEL))
+        self.obstacles.append(Rect(
+            v(p1[0] - SEA_LEVEL, p1[1] - SEA_LEVEL),
+            v(p4[0] + SEA_LEVEL, y + SEA_LEVEL)
+        ))
 
     def create_goal(self, x1, x2, y=20):
-        self.goal = Rect(v(x1 + 200, y), v(x2 - 200, y + 100))
+        self.goal = g = Rect(v(x1 + 200, y), v(x2 - 200, y + 100))
+        body = pymunk.Body(pymunk.inf, pymunk.inf)
+        sensor = pymunk.Poly(body, [
+            tuple(g.bl), tuple(g.tl), tuple(g.tr), tuple(g.br)
+        ])
+        sensor.sensor = True
+        sensor.collision_type = COLLISION_GOAL
+        self.space.add_static(sensor)
+        self.goals[sensor] = g
+
+    def create_sea(self):
+        """Create a sensor filling the sea below Susie.
+
+        Its body is not in the space, and the sensor is added as an active
+        shape, so that it can be moved along under Susie each tick.
+
+        """
+        self.sea_body = pymunk.Body(pymunk.inf, pymunk.inf)
+        w = self.SEA_WIDTH * 0.5
+        d = self.SEA_DEPTH
+        sensor = pymunk.Poly(self.sea_body, [(-w, -d), (-w, 0), (w, 0), (w, -d)])
+        sensor.sensor = True
+        sensor.collision_type = COLLISION_SEA
+        self.space.add(sensor)
+
+    def on_touch_sea(self, space, arbiter):
+        # Only note the contact; the squid can't be removed mid-step
+        self.touched_sea = True
+        return False
+
+    def on_touch_goal(self, space, arbiter):
+        squid, goal = arbiter.shapes
+        self.touched_goal = self.goals[goal]
+        return False
 
     def create_floor(self):
         self.create_island(0, 676)
 
+    def clearance(self, pos):
+        """Distance from pos to the nearest static geometry, tether or the sea."""
+        x, y = pos
+        d = y
+        for r in self.obstacles:
+            dx = max(r.left - x, 0, x - r.right)
+            dy = max(r.bottom - y, 0, y - r.top)
+            d = min(d, math.hypot(dx, dy))
+        # Only tethers within d horizontally can be nearer
+        for a in self.actor_index.query(Rect(v(x - d, y), v(x + d, y + 1))):
+            if y < a.position.y:
+                d = min(d, abs(x - a.position.x))
+        return max(d, 0)
+
     def update(self, dt):
         self.particles.update(dt)
-        for a in self.actors:
+        self.simulate(dt)
+
+    def simulate(self, dt):
+        """Advance the physics and game rules by dt, in fixed ticks."""
+        self.accumulator += dt
+        n = 0
+        while self.accumulator >= self.TIMESTEP:
+            if n == self.MAX_CATCH_UP:
+                # Too far behind; drop the backlog
+                self.accumulator = 0
+                break
+            self.tick()
+            self.accumulator -= self.TIMESTEP
+            n += 1
+
+    def tick(self):
+        """Advance the physics and game rules by one fixed timestep."""
+        dt = self.TIMESTEP
+        for a in self.wake_actors():
             a.update(dt)
         if not self.crashed and not self.won:
-            self.check_crash()
             self.squid.update(dt)
-
-            g = self.goal
-            if g and self.squid.position in g:
-                self.won = True
-                self.squid.stop_all()
-                self.create_sprite('sprites/susie-destroy', g.left + 200, g.bottom + 22)
-                self.dispatch_event('on_goal')
-
-            # We run the physics with very small time steps
-            # in order to give more sensitive collisions at speed
-            for i in xrange(5):
-                self.space.step(0.2 / TARGET_FPS)
-
-    def check_crash(self):
-        p = self.squid.position
-        if p.y < 0:
-            if self.crashed:
-                return
-            self.distance = p.x * 0.1
-            self.crashed = True
-            self.remove_squid()
+            self.sea_body.position = (self.squid.position.x, 0)
+
+            # We run the physics in smaller substeps, as many as the substep
+            # policy asks for, to give more sensitive collisions at speed
+            n = self.substeps.substeps(self, dt)
+            step = dt / n
+            for i in xrange(n):
+                before = v(self.squid.position)
+                self.space.step(step)
+                if self.dispatch_contacts(before):
+                    break
+            # Awake actors may have been dragged far from where they started
+            self.reindex_actors(self.awake)
+        self.ticks += 1
+
+    def dispatch_contacts(self, before):
+        """Act on the sensors Susie touched in the last substep.
+
+        before is her position at the start of the substep. Returns True if
+        the flight is over.
+
+        """
+        if self.touched_sea:
+            self.crash(before, v(self.squid.position))
+            return True
+        g = self.touched_goal
+        if g is not None:
+            self.won = True
             self.squid.stop_all()
-            self.splash.play()
-            vx, vy = self.squid.body.velocity * 0.7
-            vy = max(20, vy * -1)
-            self.particle_splash(p, v(vx, vy))
-            self.dispatch_event('on_crash', self.distance)
+            self.create_sprite('sprites/susie-destroy', g.left + 200, g.bottom + 22)
+            self.dispatch_event('on_goal')
+            return True
+        return False
+
+    def crash(self, a, b):
+        """Crash into the sea, having moved from a to b in the last substep."""
+        # Find where Susie's path crossed sea level
+        if a.y > 0 and a.y > b.y:
+            t = min(1.0, a.y / (a.y - b.y))
+            p = a + (b - a) * t
+        else:
+            p = b
+        self.distance = p.x * 0.1
+        self.crashed = True
+        self.remove_squid()
+        self.squid.stop_all()
+        self.splash.play()
+        vx, vy = self.squid.body.velocity * 0.7
+        vy = max(20, vy * -1)
+        self.particle_splash(p, v(vx, vy))
+        self.dispatch_event('on_crash', self.distance)
 
     def draw(self, viewport):
-        for s in self.sprites:
-            s.draw()
-        # Draw with depth testing
-        gl.glDepthFunc(gl.GL_LEQUAL)
-        if self.splash_group:
-            self.splash_group.draw()
-        for a in self.actors:
-            a.draw()
-        if self.crashed:
-            # Keep particles going
-            self.particles.draw()
-        elif not self.won:
-            self.squid.draw()
-        gl.glDepthFunc(gl.GL_ALWAYS)
+        """Bring the sprites and vertex lists in the batch up to date and draw it."""
+        self.particles.set_viewport(viewport)
+
+        # Show only the sprites and actors near the viewport
+        vp = self.draw_area
+        vp.assign(viewport)
+        vp.extend_ip(self.DRAW_MARGIN)
+        sprites = self.sprite_index.query(vp)
+        for s in self.visible_sprites - sprites:
+            s.visible = False
+        for s in sprites - self.visible_sprites:
+            s.visible = True
+        self.visible_sprites = sprites
+
+        actors = self.actor_index.query(vp)
+        for a in self.visible_actors - actors:
+            a.set_visible(False)
+        for a in actors - self.visible_actors:
+            a.set_visible(True)
+        self.visible_actors = actors
+        for a in actors:
+            a.update_sprite()
+        visible = not (self.crashed or self.won)
+        if visible != self.squid_visible:
+            self.squid.set_visible(visible)
+            self.squid_visible = visible
+        if visible:
+            self.squid.update_sprite()
+        self.particles.draw()
+        self.layers.draw()
 
     def controllers(self):
         return list(self.squid.controllers())
@@ -259,3 +485,59 @@ class World(EventDispatcher):
 
 World.register_event_type('on_crash')
 World.register_event_type('on_goal')
+
+
+class HeadlessWorld(World):
+    """A World that runs only the physics, for simulating without a display.
+
+    Set up the squid's components after constructing (loading a level detaches
+    them), then call reset() and run_until_done().
+
+    """
+    def create_layers(self):
+        """There is nothing to draw without a display."""
+        return None
+
+    def particle_splash(self, pos, vel):
+        """There are no particles without a display."""
+
+    def create_sprite(self, img, x, y):
+        """There are no sprites without a display."""
+
+    def update(self, dt):
+        self.simulate(dt)
+
+    def draw(self, viewport):
+        pass
+
+    def outcome(self):
+        if self.crashed:
+            return 'crashed'
+        elif self.won:
+            return 'won'
+        return 'timeout'
+
+    def run_until_done(self, max_time, before_tick=None):
+        """Fly until Susie crashes, reaches the goal or max_time elapses.
+
+        If given, before_tick(world) is called before each tick, eg. to feed
+        in control inputs.
+
+        Returns a FlightResult giving the outcome ('crashed', 'won' or
+        'timeout'), the distance flown in metres and the flight time in
+        seconds.
+
+        """
+        # Count whole ticks, as summing timesteps drifts past max_time
+        max_ticks = int(round(max_time / self.TIMESTEP))
+        ticks = 0
+        while ticks < max_ticks and not (self.crashed or self.won):
+            if before_tick:
+                before_tick(self)
+            self.tick()
+            ticks += 1
+        if self.crashed:
+            distance = self.distance
+        else:
+            distance = self.squid.position.x * 0.1
+        return FlightResult(self.outcome(), distance, ticks * self.TIMESTEP)
@@ -32,7 +32,7 @@ setup(
         'pyglet>=1.1.4',
         'pymunk==2.1.0',
         'pygame>=1.9.1',
-        'lepton==1.0b2',
+        'numpy>=1.5',
         'distribute>=0.6'
     ],
     package_data={
@@ -0,0 +1,65 @@
+import math
+import numpy
+from nose.tools import eq_
+from korovic.components.aero import AeroTable, AeroTableRows
+from korovic.components.wings import Wing, BiplaneWing, Aerolon, Ekranoplan
+
+
+def frange(lo, hi, step):
+    x = lo
+    while x <= hi:
+        yield x
+        x += step
+
+
+def test_table_nodes_and_clamping():
+    t = AeroTable(lambda x: x * x, 0, 10, 1)
+    eq_(len(t), 11)
+    eq_(t(3), 9.0)
+    eq_(t(3.5), 12.5)
+    eq_(t(-5), 0.0)
+    eq_(t(20), 100.0)
+
+
+def test_rows():
+    a = AeroTable(lambda x: x, 0, 10, 1)
+    b = AeroTable(lambda x: 2 * x + 1, 0, 10, 1)
+    rows = AeroTableRows([a, b, a])
+    eq_(rows.sample(numpy.array([2.5, 2.5, 20])).tolist(), [2.5, 6.0, 10.0])
+
+
+def check_close(table, reference, xs, tolerance):
+    for x in xs:
+        assert abs(table(x) - reference(x)) < tolerance, (x, table(x), reference(x))
+
+
+def test_lift_tables_match_formulas():
+    for cls in Wing, BiplaneWing, Aerolon, Ekranoplan:
+        cls.build_tables()
+        tolerance = cls.LIFT_RATE * 1e-4
+        check_close(cls.lift_table, cls.lift_formula, frange(-44.9, 44.9, 0.13), tolerance)
+
+
+def test_ground_effect_table():
+    Ekranoplan.build_tables()
+    check_close(
+        Ekranoplan.ground_effect_table, Ekranoplan.ground_effect_formula,
+        frange(0, 150, 0.37), 1e-4
+    )
+
+
+def test_deflection_table():
+    Aerolon.build_tables()
+    check_close(
+        Aerolon.deflection_table, Aerolon.deflection_formula,
+        frange(0, 179.9, 0.29), 1e-5
+    )
+
+
+def test_reference_mode():
+    Wing.build_tables()
+    w = Wing.__new__(Wing)
+    w.reference = True
+    eq_(w.lift_coefficient(12.3), 5 * math.sin(2 * math.radians(17.3)))
+    w.reference = False
+    assert w.lift_coefficient(12.3) != w.lift_formula(12.3)
@@ -0,0 +1,118 @@
+import math
+from korovic.vector import v
+from korovic.components.engines import Engine
+from korovic.components.wings import Wing, BiplaneWing
+from korovic.components.arrays import ComponentArrays
+
+
+class Body(object):
+    """Just enough of a pymunk body to accumulate forces."""
+    def __init__(self, angle, velocity):
+        self.position = v(100, 200)
+        self.angle = angle
+        self.velocity = v(velocity)
+        self.mass = 100
+        self.force = v(0, 0)
+        self.torque = 0
+
+    def local_to_world(self, p):
+        return self.position + v(p).rotated(math.degrees(self.angle))
+
+    def apply_force(self, f, r):
+        self.force += v(f)
+        self.torque += v(r).cross(f)
+
+
+class Squid(object):
+    def __init__(self, body, fuel):
+        self.body = body
+        self.fuel = fuel
+
+    def has_fuel(self):
+        return self.fuel > 0
+
+    def draw_fuel(self, amount):
+        if amount == 0:
+            return True
+        if self.has_fuel():
+            drawn = min(self.fuel, amount)
+            self.body.mass -= drawn
+            self.fuel -= drawn
+            return True
+        return False
+
+
+class Slots(object):
+    components = []
+
+
+def make_component(cls, squid, point, angle, active=False):
+    c = cls.__new__(cls)
+    c.squid = squid
+    c.attachment_point = v(point)
+    c.angle = angle
+    c.active = active
+    return c
+
+
+LOADOUT = [
+    (Engine, (30, -10), 0.3, True),
+    (Engine, (-20, 5), -0.2, True),
+    (Engine, (0, 15), 1.0, False),
+    (Wing, (10, 0), 0.1, False),
+    (BiplaneWing, (-15, 0), -0.05, False),
+]
+
+
+def setup():
+    Wing.build_tables()
+    BiplaneWing.build_tables()
+
+
+def run(vectorized, angle, velocity, fuel, dt=0.1):
+    squid = Squid(Body(angle, velocity), fuel)
+    squid.slots = Slots()
+    squid.slots.components = [
+        make_component(cls, squid, p, a, active) for cls, p, a, active in LOADOUT
+    ]
+    if vectorized:
+        ComponentArrays(squid).update(dt)
+    else:
+        for c in squid.slots.components:
+            c.update(dt)
+    return squid
+
+
+def check_same(angle, velocity, fuel):
+    a = run(False, angle, velocity, fuel)
+    b = run(True, angle, velocity, fuel)
+    for x, y in zip(a.body.force, b.body.force):
+        assert abs(x - y) < 1e-6 * max(1, abs(x)), (a.body.force, b.body.force)
+    assert abs(a.body.torque - b.body.torque) < 1e-6 * max(1, abs(a.body.torque))
+    assert abs(a.fuel - b.fuel) < 1e-9
+    started = [c.started for c in a.slots.components[:3]]
+    assert started == [c.started for c in b.slots.components[:3]]
+
+
+def test_matches_components():
+    """The vectorized forces match those the components apply themselves."""
+    for angle in (0, 0.4, -1.2):
+        for velocity in ((300, 20), (500, -150), (0.1, 0.1), (-200, 0)):
+            check_same(angle, velocity, 10)
+
+
+def test_matches_reference():
+    """The vectorized forces match the reference formulas too."""
+    Wing.reference = True
+    try:
+        for angle in (0, 0.4, -1.2):
+            check_same(angle, (300, 20), 10)
+    finally:
+        del Wing.reference
+
+
+def test_runs_out_of_fuel():
+    """Only the engines that get some fuel thrust."""
+    check_same(0.2, (300, 0), 0.3)
+    check_same(0.2, (300, 0), 0.7)
+    check_same(0.2, (300, 0), 0)
@@ -0,0 +1,48 @@
+from nose.tools import eq_
+from korovic.background import Backdrop, Gradient
+from korovic.camera import Rect
+
+
+class VertexList(object):
+    def __init__(self, n):
+        self.vertices = [None] * n
+        self.colors = [None] * n
+
+
+class CountingBackdrop(Backdrop):
+    rebuilds = 0
+
+    def rebuild(self, key):
+        self.rebuilds += 1
+        super(CountingBackdrop, self).rebuild(key)
+
+
+def make_backdrop():
+    g = Gradient([(0, (0.0, 0.0, 0.0)), (1, (1.0, 1.0, 1.0))], 1000)
+    b = CountingBackdrop(g, [(50, (0.5, 0.5, 0.5), 0.5)])
+    b.sky_list = VertexList(8)
+    b.band_list = VertexList(12)
+    return b
+
+
+def viewport(alt):
+    return Rect((0, alt), (800, alt + 600))
+
+
+def test_rebuilt_only_on_sky_change():
+    b = make_backdrop()
+    b.update(viewport(100))
+    b.update(viewport(101))
+    b.update(viewport(102))
+    eq_(b.rebuilds, 1)
+    b.update(viewport(120))
+    eq_(b.rebuilds, 2)
+
+
+def test_band_on_screen():
+    """Moving with the band in view doesn't rewrite it."""
+    b = make_backdrop()
+    for alt in (20, 20.5, 21, 21.25, 22):
+        b.update(viewport(alt))
+    eq_(b.rebuilds, 1)
+    eq_(b.band_list.vertices, [0, 0, 0.5, 800, 0, 0.5, 800, 50, 0.5, 0, 50, 0.5])
@@ -0,0 +1,47 @@
+from nose.tools import eq_
+from nose.plugins.skip import SkipTest
+from korovic.headless import HEADLESS
+from korovic.components import Rocket, Wing, Balloon
+from korovic import batch
+from korovic.snapshot import BodySnapshot, actor_bodies
+from korovic.camera import Rect
+
+
+def setup():
+    if not HEADLESS:
+        raise SkipTest('flights need KOROVIC_HEADLESS=1')
+
+
+def test_same_flight_twice():
+    """Flying a loadout again on a level with balloons gives the same result."""
+    job = (0, 'level4', [(Rocket, 0, 10), (Wing, 1, 5), (Balloon, 2, None)], 30)
+    key, first = batch._run(job)
+    assert first.distance > 50, first
+    key, second = batch._run(job)
+    eq_(second.outcome, first.outcome)
+    eq_(second.distance, first.distance)
+    eq_(second.time, first.time)
+
+
+
+def test_balloons_restored():
+    """Balloons Susie has flown into are put back for the next flight."""
+    from korovic.vector import v
+    world = batch.get_world('level4')
+    batch.fit(world, [(Rocket, 0, 10), (Wing, 1, 5), (Balloon, 2, None)])
+    bodies = actor_bodies(world.actors)
+    start = [BodySnapshot.get_state(b) for b in bodies]
+
+    world.reset()
+    world.squid.position = v(28300, 600)
+    world.squid.body.velocity = (600, 0)
+    world.run_until_done(3)
+    assert world.awake
+    assert [BodySnapshot.get_state(b) for b in bodies] != start
+    # They are still found where they were knocked to
+    for a in world.actors:
+        p = a.position
+        assert a in world.actor_index.query(Rect(p, p + v(1, 1)))
+
+    world.reset()
+    eq_([BodySnapshot.get_state(b) for b in bodies], start)
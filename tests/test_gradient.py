@@ -1,5 +1,5 @@
 from nose.tools import eq_
-from korovic.background import Gradient, lerp
+from korovic.background import Gradient, lerp, sky, SKY_TOP
 
 
 g = Gradient(
@@ -34,3 +34,21 @@ def test_gradient_interpolation():
 def test_gradient_clamp():
     eq_(g.colour(-1), (1, 1, 1))
     eq_(g.colour(12), (1, 0, 0))
+
+
+def test_table():
+    """The table holds the gradient sampled every step."""
+    t = g.table(step=0.25)
+    eq_(len(t.colours), 41)
+    eq_(t.colour(2.5), g.colour(2.5))
+    eq_(t.colour(2.6), g.colour(2.5))
+    eq_(t.colour(-5), g.colour(0))
+    eq_(t.colour(50), g.colour(10))
+
+
+def test_sky_table():
+    """The sky table is within a fraction of a colour level everywhere."""
+    t = sky.table()
+    for alt in xrange(-100, SKY_TOP + 100, 37):
+        for a, b in zip(t.colour(alt), sky.colour(alt)):
+            assert abs(a - b) < 1.0 / 512
@@ -0,0 +1,37 @@
+from nose.tools import eq_
+from korovic.hashrand import splitmix64, cell_key, CellRandom, row_random
+
+
+def test_splitmix64():
+    """splitmix64 matches the reference implementation's first outputs."""
+    eq_(splitmix64(0), 0xE220A8397B1DCDAF)
+    eq_(splitmix64(0x9E3779B97F4A7C15), 0x6E789E6AA1B965F4)
+
+
+def test_cell_random_is_stable():
+    """The same cell always gives the same numbers."""
+    a = CellRandom(cell_key(3, -7, 1))
+    b = CellRandom(cell_key(3, -7, 1))
+    eq_([a.random() for i in xrange(5)], [b.random() for i in xrange(5)])
+
+
+def test_cells_differ():
+    a = CellRandom(cell_key(3, -7))
+    b = CellRandom(cell_key(-7, 3))
+    assert a.random() != b.random()
+
+
+def test_random_range():
+    r = CellRandom(cell_key(0, 0))
+    for i in xrange(1000):
+        assert 0 <= r.random() < 1
+        assert 3 <= r.randint(3, 5) <= 5
+
+
+def test_row_random():
+    """Generating a row at once gives the same numbers as each cell alone."""
+    xs = [-3, -1, 0, 2, 1 << 40]
+    u = row_random(xs, -2, 6, seed=5)
+    for row, x in zip(u, xs):
+        r = CellRandom(cell_key(x, -2, 5))
+        eq_(list(row), [r.random() for i in xrange(6)])
@@ -0,0 +1,56 @@
+import shutil
+import tempfile
+from nose.tools import eq_
+from pkg_resources import resource_string
+from korovic import levels
+from korovic.levels import compile_svg
+
+
+def level_svg(name):
+    return resource_string('korovic', 'data/levels/%s.svg' % name)
+
+
+def test_compile_level1():
+    """The first level compiles to an island, a city and a wall."""
+    lvl = compile_svg(level_svg('level1'))
+    eq_(lvl.title, 'Take to ze skies!')
+    eq_(lvl.money, 320)
+    eq_(lvl.width, 3000)
+    eq_(lvl.islands, [(0, 676), (2414, 3206)])
+    eq_(lvl.goals, [(2414, 3206)])
+    eq_(lvl.balloons, [])
+    eq_(lvl.sprites, [('sprites/island-lair', 0, 0), ('sprites/city', 2414, 0)])
+
+
+def test_freeflight_has_no_wall():
+    """Without a goal, there's no wall at the end of the level."""
+    lvl = compile_svg(level_svg('freeflight'))
+    eq_(lvl.goals, [])
+    eq_(lvl.width, None)
+
+
+def test_cache_roundtrip():
+    """A level read back from the disk cache equals the compiled level."""
+    lvl = compile_svg(level_svg('level4'))
+    cache_dir = levels.CACHE_DIR
+    levels.CACHE_DIR = tempfile.mkdtemp()
+    try:
+        levels._write_cache('test', lvl)
+        eq_(levels._read_cache('test'), lvl)
+    finally:
+        shutil.rmtree(levels.CACHE_DIR)
+        levels.CACHE_DIR = cache_dir
+
+
+def test_all_levels_compile():
+    names = levels.level_names()
+    assert 'level1' in names
+    cache_dir, cache = levels.CACHE_DIR, levels._cache
+    levels.CACHE_DIR = tempfile.mkdtemp()
+    levels._cache = {}
+    try:
+        for name, lvl in levels.compile_all().items():
+            assert lvl.islands, name
+    finally:
+        shutil.rmtree(levels.CACHE_DIR)
+        levels.CACHE_DIR, levels._cache = cache_dir, cache
@@ -0,0 +1,160 @@
+from nose.tools import eq_
+from korovic.camera import Rect
+from korovic.particles import (
+    ParticleSystem, ParticleGroup, ParticleBudget, Particle, StaticEmitter, Disc,
+    Movement, Gravity, Lifetime, ColorBlender, Bounce
+)
+
+
+def make_group(*controllers):
+    emitter = StaticEmitter(
+        rate=100,
+        position=Disc((0, 100), 10),
+        velocity=Disc((50, 0), 1),
+        template=Particle(size=20.0),
+        time_to_live=0.51
+    )
+    system = ParticleSystem()
+    group = ParticleGroup(controllers=[emitter] + list(controllers), system=system)
+    return system, group
+
+
+def test_emit_and_expire():
+    """The emitter stops after its time to live and particles then expire."""
+    system, group = make_group(Lifetime(max_age=1))
+    for i in xrange(25):
+        system.update(0.02)
+    eq_(len(group), 50)
+    for i in xrange(25):
+        system.update(0.02)
+    eq_(len(group), 50)
+    for i in xrange(30):
+        system.update(0.02)
+    eq_(len(group), 0)
+
+
+def test_grows_beyond_capacity():
+    system, group = make_group()
+    group.update(0.5)
+    eq_(len(group), 50)
+    eq_(group.size[:50].tolist(), [20.0] * 50)
+
+
+def test_movement_and_gravity():
+    system, group = make_group(Movement(), Gravity((0, -100)))
+    group.update(0.1)
+    n = len(group)
+    vy = group.velocity[:n, 1].copy()
+    y = group.position[:n, 1].copy()
+    group.update(0.1)
+    assert (abs(group.velocity[:n, 1] - (vy - 10)) < 1e-9).all()
+    assert (abs(group.position[:n, 1] - (y + vy * 0.1)) < 1e-9).all()
+
+
+def test_bounce():
+    group = ParticleGroup(controllers=[Bounce(0, bounce=0.5)])
+    s = group.new(2)
+    group.position[s] = [(0, -2), (0, 5)]
+    group.velocity[s] = [(3, -10), (3, -10)]
+    group.update(0.1)
+    eq_(group.position[:2].tolist(), [[0, 1], [0, 5]])
+    eq_(group.velocity[:2].tolist(), [[3, 5], [3, -10]])
+
+
+def test_color_blender():
+    group = ParticleGroup(controllers=[
+        ColorBlender([(0, (1.0, 1.0, 1.0, 1.0)), (2, (0.0, 0.0, 0.0, 0.0))])
+    ])
+    s = group.new(1)
+    group.age[s] = 0.5
+    group.update(0.5)
+    eq_(group.color[0].tolist(), [0.5, 0.5, 0.5, 0.5])
+
+
+def test_retire_and_reuse():
+    """Released groups are pooled once empty and reused for the same effect."""
+    system = ParticleSystem(retire_after=1.0)
+    emitter = StaticEmitter(
+        rate=100,
+        position=Disc((0, 0), 1),
+        velocity=Disc((0, 0), 1),
+        template=Particle(),
+        time_to_live=0.25
+    )
+    group = system.new_group('splash', [Lifetime(max_age=0.5), emitter])
+    system.release(group)
+    system.update(0.1)
+    eq_(system.stats()['particles'], 10)
+    for i in xrange(20):
+        system.update(0.1)
+    eq_(system.stats()['groups'], 0)
+    eq_(system.stats()['pooled'], 1)
+    assert system.new_group('rocket') is not group
+    assert system.new_group('splash') is group
+    eq_(system.stats()['pooled'], 0)
+
+
+def test_release_retired_group():
+    """A group released after it has retired is pooled straight away."""
+    system = ParticleSystem(retire_after=1.0)
+    group = system.new_group('rocket')
+    system.update(1.5)
+    eq_(len(system), 0)
+    system.release(group)
+    eq_(system.stats()['pooled'], 1)
+    assert system.new_group('rocket') is group
+
+
+def test_wake_retired_group():
+    system = ParticleSystem(retire_after=1.0)
+    group = system.new_group('rocket')
+    system.update(1.5)
+    eq_(len(system), 0)
+    group.bind_controller(StaticEmitter(
+        rate=10,
+        position=Disc((0, 0), 1),
+        velocity=Disc((0, 0), 1),
+        template=Particle(),
+    ))
+    eq_(len(system), 1)
+
+
+def test_budget_detail():
+    budget = ParticleBudget(1000)
+    budget.live = 400
+    eq_(budget.detail(), 1.0)
+    budget.live = 750
+    eq_(budget.detail(), 0.5)
+    budget.live = 1000
+    eq_(budget.detail(), ParticleBudget.MIN_DETAIL)
+    budget.live = 990
+    eq_(budget.reserve(50), 10)
+    eq_(budget.reserve(50), 0)
+
+
+def test_emitters_share_budget():
+    """However many emitters run, the live count never exceeds the limit."""
+    system = ParticleSystem(budget=ParticleBudget(100))
+    for i in xrange(10):
+        system.new_group('rocket', [
+            Lifetime(max_age=5),
+            StaticEmitter(
+                rate=100,
+                position=Disc((0, 0), 1),
+                velocity=Disc((0, 0), 1),
+                template=Particle(),
+            )
+        ])
+    for i in xrange(50):
+        system.update(0.05)
+        assert system.stats()['particles'] <= 100
+
+
+def test_cull():
+    system, group = make_group()
+    system.set_viewport(Rect((-1000, -1000), (1000, 1000)))
+    group.update(0.1)
+    group.position[:5] = (5000, 0)
+    n = len(group)
+    system.update(0.0)
+    eq_(len(group), n - 5)
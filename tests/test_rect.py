@@ -0,0 +1,41 @@
+import numpy
+from nose.tools import eq_
+from korovic.camera import Rect, Camera
+from korovic.vector import v
+
+
+def test_edges_and_corners():
+    r = Rect(v(10, 20), v(110, 70))
+    eq_((r.left, r.bottom, r.right, r.top), (10, 20, 110, 70))
+    eq_((r.width, r.height), (100, 50))
+    eq_(r.br, (110, 20))
+    eq_(r.tl, (10, 70))
+    assert r.bl is r.bl
+
+
+def test_in_place():
+    r = Rect((0, 0), (10, 10))
+    r.translate_ip((5, -5))
+    eq_(r, Rect((5, -5), (15, 5)))
+    eq_(r.bl, (5, -5))
+    r.extend_ip(1)
+    eq_(r, Rect((4, -6), (16, 6)))
+    eq_(r.translate((1, 1)).extend(1), Rect((4, -6), (18, 8)))
+    r.assign(Rect((1, 2), (3, 4)))
+    eq_(r, Rect((1, 2), (3, 4)))
+    eq_(r.tr, (3, 4))
+
+
+def test_viewport_moves_in_place():
+    c = Camera()
+    vp = c.viewport()
+    c.set_pos(c.pos + v(100, 50))
+    assert c.viewport() is vp
+    eq_(vp, Rect(c.pos - c.ss, c.pos + c.ss))
+
+
+def test_contains_many():
+    r = Rect((0, 0), (10, 10))
+    points = numpy.array([(5, 5), (0, 0), (10, 5), (-1, 3), (9.9, 9.9)])
+    eq_(r.contains_many(points).tolist(), [p in r for p in points])
+    eq_(r.contains_many(points).tolist(), [True, True, False, False, True])
@@ -0,0 +1,31 @@
+from StringIO import StringIO
+from nose.tools import eq_, raises
+from korovic.replay import Replay, ReplayError
+from korovic.components import JetEngine, Wing, SmallFuelTank
+
+
+def roundtrip(replay):
+    f = StringIO()
+    replay.save(f)
+    return Replay.load(StringIO(f.getvalue()))
+
+
+def test_roundtrip():
+    """A replay can be saved and loaded again."""
+    r = Replay(
+        'level2',
+        [(JetEngine, 0, 0.25), (Wing, 1, 0.1), (SmallFuelTank, 3, 0.0)],
+        [(0, 0, True), (95, 0, False), (96, 2, True)]
+    )
+    r2 = roundtrip(r)
+    eq_(r2.level, r.level)
+    eq_(r2.loadout, r.loadout)
+    eq_(r2.events, r.events)
+
+
+@raises(ReplayError)
+def test_truncated():
+    """Loading a truncated replay raises ReplayError"""
+    f = StringIO()
+    Replay('level1', [(Wing, 1, 0.1)], [(3, 1, True)]).save(f)
+    Replay.load(StringIO(f.getvalue()[:-2]))
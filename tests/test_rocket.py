@@ -0,0 +1,46 @@
+import gc
+from nose.tools import eq_
+from korovic.particles import ParticleSystem
+from korovic.components.engines import Rocket
+
+
+class World(object):
+    def __init__(self):
+        self.particles = ParticleSystem()
+
+
+class Squid(object):
+    def __init__(self):
+        self.world = World()
+
+
+def make_rocket(squid):
+    r = Rocket.__new__(Rocket)
+    r.squid = squid
+    r.particle_renderer = None
+    r.particle_controllers = ()
+    return r
+
+
+def test_release():
+    """A detached rocket's particle group goes back to the system's pool."""
+    squid = Squid()
+    r = make_rocket(squid)
+    g = r.get_particlegroup()
+    assert r.get_particlegroup() is g
+    r.release()
+    assert g.released
+    assert r.particlegroup is None
+    r.release()
+    # It is only pooled once its particles have died, so isn't reused yet
+    assert r.get_particlegroup() is not g
+
+
+def test_collectable():
+    """Rockets in a cycle with their squid can be garbage collected."""
+    squid = Squid()
+    squid.rocket = make_rocket(squid)
+    squid.rocket.get_particlegroup()
+    del squid
+    gc.collect()
+    eq_([o for o in gc.garbage if isinstance(o, Rocket)], [])
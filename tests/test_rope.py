@@ -0,0 +1,44 @@
+import math
+import ctypes
+from nose.tools import eq_
+from korovic.components.rope import VerletTether
+
+
+def segment_lengths(t):
+    p = t.points
+    d = p[1:] - p[:-1]
+    return (d * d).sum(axis=1) ** 0.5
+
+
+def test_hangs_between_ends():
+    """A slack rope sags below its ends without stretching much."""
+    t = VerletTether(a=(0, 0), b=(100, 0), segments=10)
+    t.anchor2 = t.anchor2 - (20, 0)
+    for i in xrange(200):
+        t.update(1 / 60.0)
+    assert t.points[5, 1] < -10
+    assert (segment_lengths(t) < t.segment_length * 1.05).all()
+    assert tuple(t.points[-1]) == (80, 0)
+
+
+def test_taut_rope_is_straight():
+    t = VerletTether(a=(0, 0), b=(0, 100), segments=4)
+    for i in xrange(50):
+        t.update(1 / 60.0)
+    assert (abs(t.points[:, 0]) < 1e-6).all()
+    assert abs(math.fsum(segment_lengths(t)) - 100) < 1.0
+
+
+class VertexList(object):
+    def __init__(self, n):
+        self.vertices = (ctypes.c_float * n)()
+
+
+def test_vertices_written_in_place():
+    """The points are copied into the vertex list's own array."""
+    t = VerletTether(a=(0, 0), b=(30, 0), segments=3)
+    t.vertices = VertexList(12)
+    array = t.vertices.vertices
+    t.update_vertices()
+    assert t.vertices.vertices is array
+    eq_(list(array), [0, 0, 10, 0, 10, 0, 20, 0, 20, 0, 30, 0])
@@ -0,0 +1,47 @@
+from nose.tools import eq_
+from nose.plugins.skip import SkipTest
+from korovic.headless import HEADLESS
+from korovic.vector import v
+from korovic.substeps import FixedSubsteps
+
+
+def setup():
+    if not HEADLESS:
+        raise SkipTest('flights need KOROVIC_HEADLESS=1')
+
+
+def launch(pos, vel):
+    """Drop a bare Susie into level1 at pos, moving at vel."""
+    from korovic.world import HeadlessWorld
+    world = HeadlessWorld('level1')
+    world.reset()
+    world.squid.position = v(pos)
+    world.squid.body.velocity = vel
+    return world
+
+
+def test_dive_into_sea():
+    """A crash is placed where Susie's path crossed sea level."""
+    world = launch((1500, 150), (3000, -3000))
+    # Long substeps carry her well below the sea before it is noticed
+    world.substeps = FixedSubsteps(1)
+    res = world.run_until_done(5)
+    eq_(res.outcome, 'crashed')
+    assert world.squid.position.y < -20
+    # Falling, she crosses a little short of where her launch line would
+    x = res.distance * 10
+    assert 1640 < x <= 1650, x
+
+
+def test_reach_goal():
+    """Susie wins when she reaches the goal."""
+    world = launch((2800, 200), (0, -500))
+    eq_(world.run_until_done(5).outcome, 'won')
+
+
+def test_timeout():
+    """A flight that is never over lasts exactly max_time."""
+    world = launch((250, 80), (0, 0))
+    res = world.run_until_done(60)
+    eq_(res.outcome, 'timeout')
+    eq_(res.time, 60.0)
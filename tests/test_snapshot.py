@@ -0,0 +1,35 @@
+from nose.tools import eq_
+from nose.plugins.skip import SkipTest
+from korovic.headless import HEADLESS
+from korovic.components import Rocket, Wing, Balloon
+from korovic.components import Propeller, SmallFuelTank, BiplaneWing, HotAirBalloon
+
+
+def setup():
+    if not HEADLESS:
+        raise SkipTest('flights need KOROVIC_HEADLESS=1')
+
+
+def check_restored_flight(loadout):
+    from korovic.world import HeadlessWorld
+    from korovic import batch
+    world = HeadlessWorld('level1')
+    batch.fit(world, loadout)
+    # The first flight builds Susie afresh, the others restore her snapshot
+    fresh = batch.fly(world, 30)
+    assert fresh.distance > 50, fresh
+    for i in xrange(2):
+        eq_(batch.fly(world, 30), fresh)
+
+
+def test_tethered_balloon():
+    """A flight from a snapshot goes just like one from a fresh Susie."""
+    check_restored_flight([(Rocket, 0, 10), (Wing, 1, 5), (Balloon, 2, None)])
+
+
+def test_hot_air_balloon():
+    """Hot air balloons cool down between flights."""
+    check_restored_flight([
+        (Propeller, 2, None), (SmallFuelTank, 3, None),
+        (BiplaneWing, 0, None), (HotAirBalloon, 5, None)
+    ])
@@ -1,8 +1,9 @@
+import math
 from nose.tools import eq_
 from unittest import TestCase
 from korovic.camera import Rect
 from korovic.vector import v
-from korovic.background import Clouds, SpatialSparseHash
+from korovic.background import Clouds, Stars, SpatialSparseHash
 
 def set_eq(s1, s2):
     assert s1 == s2, """s2 - s1 == %r\ns1 - s2 == %r""" % (
@@ -80,3 +81,61 @@ class CloudsTest(TestCase):
         positions = [c.position for c in self.clouds.for_viewport(self.viewport)]
         pos2 = [c.position for c in Clouds().for_viewport(self.viewport)]
         assert positions == pos2
+
+    def test_rows(self):
+        """Generating a row of cells at once matches generating each cell."""
+        for y in (500, 4000, 49000):
+            xs = [-1000, -500, 0, 500, 7000]
+            row = self.clouds.get_row(y, xs)
+            eq_(row, [self.clouds.get(v(x, y)) for x in xs])
+
+    def test_set_viewport(self):
+        """Moving the viewport keeps exactly the cells around it current."""
+        path = [(7000, 500), (7010, 505), (7400, 900), (6000, 300), (20000, 8000), (20100, 8000)]
+        for offset in path:
+            vp = self.get_viewport(offset)
+            self.clouds.set_viewport(vp)
+            set_eq(set(self.clouds.current), set(self.clouds._cells(vp.extend(256))))
+
+    def test_set_viewport_unchanged(self):
+        """Nothing is shown or hidden while no cell boundary is crossed."""
+        self.clouds.set_viewport(self.viewport)
+        misses = self.clouds.cache_misses
+        self.clouds.set_viewport(self.get_viewport((7010, 510)))
+        eq_(self.clouds.cache_misses, misses)
+
+class StarsTest(TestCase):
+    def setUp(self):
+        Stars.load()
+        self.stars = Stars()
+
+    def test_no_stars_low(self):
+        eq_(self.stars.get_row(15000, [0, 500]), [[], []])
+
+    def test_rows(self):
+        """Generating a row of cells at once matches generating each cell."""
+        for y in (25000, 60000):
+            xs = [-500, 0, 500, 1000]
+            row = self.stars.get_row(y, xs)
+            eq_(row, [self.stars.get(v(x, y)) for x in xs])
+
+    def test_density(self):
+        """More stars are generated at a higher density."""
+        dense = Stars(density=Stars.DENSITY * 4)
+        xs = range(0, 10000, 500)
+        count = lambda s: sum(len(c) for c in s.get_row(40000, xs))
+        assert count(dense) > count(self.stars) * 2
+
+    def test_show_row(self):
+        """A row of cells gets a quad for each star."""
+        xs = [-500, 0, 500, 1000]
+        self.stars.show_row(60000, xs)
+        for x, placements in zip(xs, self.stars.get_row(60000, xs)):
+            quads = self.stars.current[v(x, 60000)]
+            eq_(len(quads), len(placements))
+            for q, p in zip(quads, placements):
+                # Without rotation the first corner would be at the anchor
+                r = math.radians(-p.rotation)
+                ax, ay = -self.stars.image.anchor_x, -self.stars.image.anchor_y
+                x0 = p.position[0] + ax * math.cos(r) - ay * math.sin(r)
+                assert abs(q[0] - x0) < 0.01
@@ -0,0 +1,36 @@
+from nose.tools import eq_
+from korovic.vector import v
+from korovic.camera import Rect
+from korovic.spatial import GridIndex
+
+
+def test_query():
+    index = GridIndex(cell_size=100)
+    index.insert('a', Rect(v(0, 0), v(50, 50)))
+    index.insert('b', Rect(v(150, 0), v(450, 50)))
+    index.insert('c', Rect(v(-1000, -1000), v(-900, -900)))
+    eq_(index.query(Rect(v(40, 40), v(160, 60))), set(['a', 'b']))
+    eq_(index.query(Rect(v(300, 0), v(310, 10))), set(['b']))
+    eq_(index.query(Rect(v(60, 0), v(140, 100))), set())
+    eq_(index.query(Rect(v(-2000, -2000), v(0, 0))), set(['c']))
+
+
+def test_remove():
+    index = GridIndex(cell_size=100)
+    index.insert('a', Rect(v(0, 0), v(250, 50)))
+    index.insert('b', Rect(v(0, 0), v(50, 50)))
+    index.remove('a')
+    eq_(index.query(Rect(v(0, 0), v(300, 300))), set(['b']))
+    eq_(len(index), 1)
+    eq_(len(index.cells), 1)
+
+
+def test_move():
+    index = GridIndex(cell_size=100)
+    index.insert('a', Rect(v(0, 0), v(50, 50)))
+    index.move('a', Rect(v(10, 10), v(60, 60)))
+    eq_(index.query(Rect(v(55, 55), v(58, 58))), set(['a']))
+    index.move('a', Rect(v(500, 0), v(550, 50)))
+    eq_(index.query(Rect(v(0, 0), v(100, 100))), set())
+    eq_(index.query(Rect(v(520, 20), v(530, 30))), set(['a']))
+    eq_(len(index.cells), 1)
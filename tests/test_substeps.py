@@ -0,0 +1,85 @@
+from nose.tools import eq_
+from korovic.vector import v
+from korovic.substeps import AdaptiveSubsteps
+from korovic.world import World
+
+
+class Ticker(World):
+    """A world that only counts its ticks."""
+    def __init__(self):
+        self.accumulator = 0
+        self.ticks = 0
+
+    def tick(self):
+        self.ticks += 1
+
+
+def test_remainder_carried():
+    """Time left over after the last tick counts towards the next."""
+    w = Ticker()
+    t = World.TIMESTEP
+    w.simulate(2.5 * t)
+    eq_(w.ticks, 2)
+    assert abs(w.accumulator - 0.5 * t) < 1e-9
+    w.simulate(0.6 * t)
+    eq_(w.ticks, 3)
+    assert abs(w.accumulator - 0.1 * t) < 1e-9
+
+
+def test_catch_up_limited():
+    """After a long hitch, at most MAX_CATCH_UP ticks run and the rest is dropped."""
+    w = Ticker()
+    w.simulate(100 * World.TIMESTEP)
+    eq_(w.ticks, World.MAX_CATCH_UP)
+    eq_(w.accumulator, 0)
+    w.simulate(World.TIMESTEP * 1.5)
+    eq_(w.ticks, World.MAX_CATCH_UP + 1)
+
+
+class Body(object):
+    def __init__(self, velocity):
+        self.velocity = velocity
+
+
+class Squid(object):
+    position = v(0, 0)
+
+    def __init__(self, velocity):
+        self.body = Body(velocity)
+
+
+class FakeWorld(object):
+    def __init__(self, velocity, clearance):
+        self.squid = Squid(velocity)
+        self._clearance = clearance
+
+    def clearance(self, pos):
+        return self._clearance
+
+
+def substeps(velocity, clearance):
+    p = AdaptiveSubsteps(min_substeps=2, max_substeps=10, min_travel=10.0)
+    return p.substeps(FakeWorld(velocity, clearance), 0.1)
+
+
+def test_at_rest():
+    eq_(substeps((0, 0), 1000), 2)
+    eq_(substeps((0, 0), 0), 2)
+
+
+def test_scales_with_speed():
+    # 100 units per tick, 20 per substep with 40 clearance
+    eq_(substeps((1000, 0), 40), 5)
+    eq_(substeps((0, -1400), 40), 7)
+
+
+def test_scales_with_clearance():
+    # Far from anything, substeps may carry Susie further
+    eq_(substeps((1000, 0), 40), 5)
+    eq_(substeps((1000, 0), 100), 2)
+    # but never less than min_travel
+    eq_(substeps((300, 0), 0), 3)
+
+
+def test_clamped():
+    eq_(substeps((100000, 0), 40), 10)
@@ -0,0 +1,29 @@
+import math
+from nose.tools import eq_, raises
+from korovic.vector import v
+
+
+def close(a, b):
+    return all(abs(x - y) < 1e-9 for x, y in zip(a, b))
+
+
+def test_rotated_rad():
+    a = v(3, 4)
+    assert close(a.rotated_rad(0.3), a.rotated(math.degrees(0.3)))
+    assert close(a.rotated_rad(math.pi * 0.5), (-4, 3))
+
+
+def test_rotated_cs():
+    a = v(3, 4)
+    assert close(a.rotated_cs(math.cos(1.1), math.sin(1.1)), a.rotated_rad(1.1))
+
+
+def test_length():
+    eq_(v(3, 4).length, 5.0)
+    eq_(v(3, 4).length2, 25)
+    eq_(v(3, 4).scaled_to(10), (6, 8))
+
+
+@raises(AttributeError)
+def test_no_instance_dict():
+    v(1, 2).foo = 1